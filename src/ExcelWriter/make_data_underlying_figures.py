@@ -2,6 +2,7 @@ import os
 import numpy as np
 import pandas as pd
 from functools import reduce
+from store import query
 
 
 CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -25,35 +26,283 @@ metric_descriptors = {
 # Extract data for the 2nd, 6th, and 11th projection years
 projection_years = [2, 6, 11]
 
+# Series derived from the projection errors, each defined as a weighted sum of
+# (component, category, subcategory) series. Revenue series are negated, so
+# that positive errors increase deficits, as they do for outlays.
+derived_series = {
+    'Deficit': {('deficit', 'Total', 'Total'): 1},
+    'Primary Deficit': {
+        ('deficit', 'Total', 'Total'): 1,
+        ('outlay', 'Net Interest', 'Net Interest'): -1,
+    },
+    'Mandatory': {('outlay', 'Mandatory', 'Total Mandatory'): 1},
+    'Discretionary': {('outlay', 'Discretionary', 'Total Discretionary'): 1},
+    'Net Interest': {('outlay', 'Net Interest', 'Net Interest'): 1},
+    'Individual Income Taxes': {
+        ('revenue', 'Individual Income Taxes', 'Individual Income Taxes'): -1,
+    },
+    'Other Revenue': {
+        ('revenue', 'Total', 'Total'): -1,
+        ('revenue', 'Individual Income Taxes', 'Individual Income Taxes'): 1,
+    },
+}
+
+
+def read_output_data(name, database_file=None, output_path=OUTPUT_PATH):
+    """Read an output file of `main.py`, or its table in the SQLite database.
+
+    Parameters
+    ----------
+    name : str
+        Name of the output file, without the `.csv` extension.
+    database_file : str, optional
+        SQLite database to read the table from (see `store.build_store()`),
+        by default None (the output CSV file is read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if database_file is None:
+        return pd.read_csv(f"{output_path}/{name}.csv")
+
+    return query(name, database_file=database_file)
+
+
+def make_error_cube(
+        keys,
+        projection_years,
+        start_year=1984,
+        leg_changes=False,
+        database_file=None,
+        output_path=OUTPUT_PATH
+    ):
+    """Arrange the projection errors of several series into an aligned cube.
+
+    Parameters
+    ----------
+    keys : list of tuple
+        The (component, category, subcategory) keys of the series.
+    projection_years : list
+        Which projection years to extract from the errors data.
+    start_year : int, optional
+        Start of projected_fiscal_year to extract from the errors data, by default 1984
+    leg_changes : bool, optional
+        Whether to extract errors associated with legislative changes, by default False
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
+
+    Returns
+    -------
+    pd.DataFrame
+        The errors (as a percent of GDP) of the Spring baselines, with one row for
+        each projected fiscal year in the data of every series, and one column for
+        each series and projection year (with `component`, `category`,
+        `subcategory`, and `projected_year_number` column levels).
+    """
+    key_cols = ['component', 'category', 'subcategory']
+    values = 'leg_change_pct_GDP' if leg_changes else 'projection_error_pct_GDP'
+    keys = pd.MultiIndex.from_tuples(keys, names=key_cols)
+
+    # Each component's errors are read once, whatever the number of series
+    dfs = []
+    for component in keys.unique(level='component'):
+        df = read_output_data(f"{component}_projection_errors", database_file, output_path)
+        filter_conditions = (
+            (df['projected_year_number'].isin(projection_years)) &
+            (df.set_index(key_cols).index.isin(keys)) &
+            (df['Spring_flag'] == True) &
+            (df['projected_fiscal_year'] >= start_year)
+        )
+        dfs.append(df.loc[filter_conditions, key_cols + ['projected_fiscal_year', 'projected_year_number', values]])
+    df = pd.concat(dfs, ignore_index=True)
+
+    # Keep the years in the data of every series
+    num_keys = df[key_cols + ['projected_fiscal_year']].drop_duplicates().groupby('projected_fiscal_year').size()
+    years = num_keys.index[num_keys == len(keys)]
+
+    cube = df.pivot(
+        index='projected_fiscal_year',
+        columns=key_cols + ['projected_year_number'],
+        values=values
+    )
+    columns = pd.MultiIndex.from_tuples(
+        [key + (year,) for key in keys for year in sorted(projection_years)],
+        names=key_cols + ['projected_year_number']
+    )
 
-def make_all_data(worksheets):
+    return cube.reindex(index=years, columns=columns)
+
+
+def evaluate_derived_series(cube, names, definitions=derived_series):
+    """Evaluate derived series over an aligned cube of projection errors.
+
+    Parameters
+    ----------
+    cube : pd.DataFrame
+        Projection errors, created by `make_error_cube()` with the keys of the
+        series used by `names` (see `get_series_keys()`).
+    names : list
+        Names of the derived series to evaluate.
+    definitions : dict, optional
+        Definitions of the derived series, by default derived_series
+
+    Returns
+    -------
+    pd.DataFrame
+        The derived series, with the same rows as `cube` and one column for each
+        series and projection year (with `series` and `projected_year_number`
+        column levels). Values are missing when any series they use is missing.
+
+    Notes
+    -----
+    All the derived series are evaluated at once: each of their terms is one
+    array operation over the whole cube, whatever the number of series.
+    """
+    keys = cube.columns.droplevel('projected_year_number').unique()
+    horizons = cube.columns.unique(level='projected_year_number')
+
+    # Terms (series and weights) of each derived series, padded to the same
+    # number of terms
+    num_terms = max(len(definitions[name]) for name in names)
+    term_keys = np.zeros((len(names), num_terms), dtype='int')
+    term_weights = np.zeros((len(names), num_terms))
+    has_term = np.zeros((len(names), num_terms), dtype='bool')
+    for j, name in enumerate(names):
+        for t, (key, weight) in enumerate(definitions[name].items()):
+            term_keys[j, t] = keys.get_loc(key)
+            term_weights[j, t] = weight
+            has_term[j, t] = True
+
+    # Add up the terms of every derived series at once (missing values propagate)
+    values = cube.to_numpy().reshape(len(cube), len(keys), len(horizons))
+    derived = values[:, term_keys[:, 0], :] * term_weights[np.newaxis, :, 0, np.newaxis]
+    for t in range(1, num_terms):
+        term = values[:, term_keys[:, t], :] * term_weights[np.newaxis, :, t, np.newaxis]
+        derived = np.where(has_term[np.newaxis, :, t, np.newaxis], derived + term, derived)
+
+    columns = pd.MultiIndex.from_product([names, horizons], names=['series', 'projected_year_number'])
+
+    return pd.DataFrame(derived.reshape(len(cube), -1), index=cube.index, columns=columns)
+
+
+def get_series_keys(names, definitions=derived_series):
+    """Get the keys of the series used by derived series.
+
+    Parameters
+    ----------
+    names : list
+        Names of the derived series.
+    definitions : dict, optional
+        Definitions of the derived series, by default derived_series
+
+    Returns
+    -------
+    list of tuple
+        The (component, category, subcategory) keys used, in order of first use.
+    """
+    return list(dict.fromkeys(key for name in names for key in definitions[name]))
+
+
+def make_derived_data(
+        names,
+        projection_years,
+        start_year=1984,
+        leg_changes=False,
+        round_inputs=False,
+        database_file=None,
+        output_path=OUTPUT_PATH
+    ):
+    """Make the data of derived series, with one column for each series and year.
+
+    Only the series used by `names` are read, and the derived series are
+    evaluated together (see `evaluate_derived_series()`).
+
+    Parameters
+    ----------
+    names : list
+        Names of the derived series, defined in `derived_series`.
+    projection_years : list
+        Which projection years to extract from the errors data.
+    start_year : int, optional
+        Start of projected_fiscal_year to extract from the errors data, by default 1984
+    leg_changes : bool, optional
+        Whether to extract errors associated with legislative changes, by default False
+    round_inputs : bool, optional
+        Whether to round the series used before the derived series are evaluated
+        (otherwise, the derived series are rounded), by default False
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
+
+    Returns
+    -------
+    pd.DataFrame
+        The derived series, with a `Year` column and one column for each series
+        and projection year (`[projection year label] [series]`, for example
+        `Budget Year Other Revenue`), rounded to one decimal place.
+    """
+    cube = make_error_cube(
+        get_series_keys(names),
+        projection_years,
+        start_year=start_year,
+        leg_changes=leg_changes,
+        database_file=database_file,
+        output_path=output_path
+    )
+    if round_inputs:
+        cube = cube.round(1)
+
+    df = evaluate_derived_series(cube, names)
+    if not round_inputs:
+        df = df.round(1)
+
+    year_labels = {year: 'Budget Year' if year == 2 else f"Year {year}" for year in projection_years}
+    df.columns = [f"{year_labels[year]} {name}" for name, year in df.columns]
+
+    return df.reset_index(names='Year')
+
+
+def make_all_data(worksheets, database_file=None, output_path=OUTPUT_PATH):
     """Create all the data for the underlying figures and add them to the worksheets dictionary.
 
     Parameters
     ----------
     worksheets : dict
         A dictionary of worksheet names and their settings. (Created in `worksheets.py`)
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
     dict
         Same worksheets dictionary with the 'data' key added to each worksheet.
     """
-    worksheets['Figure 1']['data'] = make_quality_data('deficit', projection_years)
-    worksheets['Figure 2']['data'] = make_projection_errors_data('deficit', projection_years)
-    worksheets['Figure 3']['data'] = make_infographic_2_data(projection_years)
-    worksheets['Figure 4']['data'] = make_infographic_3_data(projection_years, start_year=1993)
-    worksheets['Figure 5']['data'] = make_quality_data('debt', projection_years)
-    worksheets['Figure 6']['data'] = make_projection_errors_data('debt', projection_years)
-    worksheets['Figure 8']['data'] = make_leg_changes_data('deficit', projection_years)
-    worksheets['Figure 9']['data'] = make_leg_changes_data('debt', projection_years)
-    worksheets['Figure 10']['data'] = make_figure_6_data(projection_years=[2], start_year=2020)
-    worksheets['Figure B-1']['data'] = make_infographic_b1_data(projection_years)
+    worksheets['Figure 1']['data'] = make_quality_data('deficit', projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 2']['data'] = make_projection_errors_data('deficit', projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 3']['data'] = make_infographic_2_data(projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 4']['data'] = make_infographic_3_data(projection_years, start_year=1993, database_file=database_file, output_path=output_path)
+    worksheets['Figure 5']['data'] = make_quality_data('debt', projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 6']['data'] = make_projection_errors_data('debt', projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 8']['data'] = make_leg_changes_data('deficit', projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 9']['data'] = make_leg_changes_data('debt', projection_years, database_file=database_file, output_path=output_path)
+    worksheets['Figure 10']['data'] = make_figure_6_data(projection_years=[2], start_year=2020, database_file=database_file, output_path=output_path)
+    worksheets['Figure B-1']['data'] = make_infographic_b1_data(projection_years, database_file=database_file, output_path=output_path)
 
     return worksheets
 
 
-def make_quality_data(component, projection_years):
+def make_quality_data(component, projection_years, database_file=None, output_path=OUTPUT_PATH):
     """Make the data for the quality metrics for a given component and projection years.
 
     Parameters
@@ -62,6 +311,11 @@ def make_quality_data(component, projection_years):
         Either 'deficit' or 'debt'.
     projection_years : list
         Which projection years to extract from the errors data.
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
@@ -69,7 +323,7 @@ def make_quality_data(component, projection_years):
     """
     assert component in ['deficit', 'debt'], "Invalid component name."
 
-    df = pd.read_csv(f"{OUTPUT_PATH}/{component}_projection_errors_summary_stats.csv")
+    df = read_output_data(f"{component}_projection_errors_summary_stats", database_file, output_path)
 
     # Filter and select the data
     keep_cols = list(metric_names.keys()) + ['projected_year_number']
@@ -103,7 +357,9 @@ def make_projection_errors_data(
         start_year=1984,
         leg_changes=False,
         calc_averages=True,
-        apply_rounding=True
+        apply_rounding=True,
+        database_file=None,
+        output_path=OUTPUT_PATH
     ):
     """Make the data for the projection errors for a given component and projection years.
 
@@ -126,6 +382,11 @@ def make_projection_errors_data(
     apply_rounding : bool, optional
         Whether to apply rounding; don't want to do this when values will have
         additional operations on them, by default True
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
@@ -133,7 +394,7 @@ def make_projection_errors_data(
     """
     assert component in ['deficit', 'debt', 'outlay', 'revenue'], "Invalid component name."
 
-    df = pd.read_csv(f"{OUTPUT_PATH}/{component}_projection_errors.csv")
+    df = read_output_data(f"{component}_projection_errors", database_file, output_path)
 
     # Filter and select the data
     keep_cols = ['projected_fiscal_year', 'projected_year_number']
@@ -187,7 +448,7 @@ def make_projection_errors_data(
     return df
 
 
-def make_infographic_2_data(projection_years):
+def make_infographic_2_data(projection_years, database_file=None, output_path=OUTPUT_PATH):
     """Make the data for Infographic 2.
 
     Makes calls to make_projection_errors_data.
@@ -196,6 +457,11 @@ def make_infographic_2_data(projection_years):
     ----------
     projection_years : list
         Which projection years to extract from the errors data.
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
@@ -205,7 +471,7 @@ def make_infographic_2_data(projection_years):
 
     dfs = {}
     for component in components:
-        dfs[component] = make_projection_errors_data(component, projection_years)
+        dfs[component] = make_projection_errors_data(component, projection_years, database_file=database_file, output_path=output_path)
         # Remove the 'Average' columns
         dfs[component] = dfs[component].loc[:, [c for c in dfs[component].columns if 'Average' not in c]]
         # Rename the columns
@@ -227,10 +493,10 @@ def make_infographic_2_data(projection_years):
     return df[cols]
 
 
-def make_infographic_3_data(projection_years, start_year=1993):
+def make_infographic_3_data(projection_years, start_year=1993, database_file=None, output_path=OUTPUT_PATH):
     """Make the data for Infographic 3.
 
-    Makes calls to make_projection_errors_data.
+    Makes calls to make_derived_data.
 
     Parameters
     ----------
@@ -238,36 +504,26 @@ def make_infographic_3_data(projection_years, start_year=1993):
         Which projection years to extract from the errors data.
     start_year : int, optional
         Start of projected_fiscal_year to extract from the errors data, by default 1993
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
     pd.DataFrame
     """
-    deficits = make_projection_errors_data(
-        'deficit',
+    # Primary deficits are calculated from the rounded deficit and net interest errors
+    df = make_derived_data(
+        ['Deficit', 'Primary Deficit', 'Net Interest'],
         projection_years,
         start_year=start_year,
-        calc_averages=False
-    )
-    deficits.columns = ["Year"] + [f"{c} Deficit Error" for c in deficits.columns[1:]]
-
-    net_interest = make_projection_errors_data(
-        'outlay',
-        projection_years,
-        category='Net Interest',
-        subcategory='Net Interest',
-        calc_averages=False
+        round_inputs=True,
+        database_file=database_file,
+        output_path=output_path
     )
-    net_interest.columns = ["Year"] + [f"{c} Net Interest Error" for c in net_interest.columns[1:]]
-
-    df = pd.merge(deficits, net_interest, on='Year')
-
-    # Calculate the primary deficits
-    for year in ['Budget Year', 'Year 6', 'Year 11']:
-        df[f"{year} Primary Deficit Error"] = (
-            df[f"{year} Deficit Error"].astype('float') -
-            df[f"{year} Net Interest Error"].astype('float')
-        )
+    df.columns = ["Year"] + [f"{c} Error" for c in df.columns[1:]]
 
     # Rearrange the column order
     cols = ["Year"]
@@ -279,7 +535,7 @@ def make_infographic_3_data(projection_years, start_year=1993):
     return df[cols]
 
 
-def make_leg_changes_data(component, projection_years):
+def make_leg_changes_data(component, projection_years, database_file=None, output_path=OUTPUT_PATH):
     """Make the data for the legislative changes for a given component and projection years.
 
     Parameters
@@ -288,6 +544,11 @@ def make_leg_changes_data(component, projection_years):
         Either 'deficit' or 'debt'.
     projection_years : list
         Which projection years to extract from the errors data.
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
@@ -295,7 +556,7 @@ def make_leg_changes_data(component, projection_years):
     """
     assert component in ['deficit', 'debt'], "Invalid component name."
 
-    df = pd.read_csv(f"{OUTPUT_PATH}/{component}_projection_errors.csv")
+    df = read_output_data(f"{component}_projection_errors", database_file, output_path)
 
     # Filter and select the data
     keep_cols = [
@@ -345,10 +606,10 @@ def make_leg_changes_data(component, projection_years):
     return out_df.round(1)
 
 
-def make_figure_6_data(projection_years, start_year=2020):
+def make_figure_6_data(projection_years, start_year=2020, database_file=None, output_path=OUTPUT_PATH):
     """Make the data for Figure 6.
 
-    Makes calls to make_projection_errors_data.
+    Makes calls to make_derived_data.
 
     Parameters
     ----------
@@ -356,86 +617,46 @@ def make_figure_6_data(projection_years, start_year=2020):
         Which projection years to extract from the errors data.
     start_year : int, optional
         Start of projected_fiscal_year to extract from the errors data, by default 2020
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
     pd.DataFrame
     """
-    dfs = {}
-    # Create leg effects data
-    dfs['Mandatory'] = make_projection_errors_data(
-        'outlay',
-        projection_years,
-        category='Mandatory',
-        subcategory='Total Mandatory',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False
-    )
-
-    dfs['Discretionary'] = make_projection_errors_data(
-        'outlay',
-        projection_years,
-        category='Discretionary',
-        subcategory='Total Discretionary',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False
-    )
-
-    dfs['Total Revenue'] = make_projection_errors_data(
-        'revenue',
-        projection_years,
-        category='Total',
-        subcategory='Total',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False,
-        apply_rounding=False
-    )
-
-    dfs['Individual Income Taxes'] = make_projection_errors_data(
-        'revenue',
+    # Leg effects data
+    leg_changes = make_derived_data(
+        ['Mandatory', 'Discretionary', 'Individual Income Taxes', 'Other Revenue'],
         projection_years,
-        category='Individual Income Taxes',
-        subcategory='Individual Income Taxes',
         start_year=start_year,
         leg_changes=True,
-        calc_averages=False,
-        apply_rounding=False
+        database_file=database_file,
+        output_path=output_path
     )
 
     # And add in the total deficit errors, too
-    dfs['Total Deficit'] = make_projection_errors_data(
-        'deficit',
+    deficits = make_derived_data(
+        ['Deficit'],
         projection_years,
         start_year=start_year,
-        leg_changes=False,
-        calc_averages=False
+        database_file=database_file,
+        output_path=output_path
     )
 
-    # Rename the columns in each DataFrame
-    for k, v in dfs.items():
-        v.rename(columns={'Budget Year': k}, inplace=True)
-
-    # Merge the DataFrames on Year
-    df = reduce(lambda left, right: pd.merge(left, right, on='Year'), dfs.values())
-
-    # Calculate the "Other Revenue" category
-    df['Total Revenue'] = df['Total Revenue'] * -1
-    df['Individual Income Taxes'] = df['Individual Income Taxes'] * -1
-    df['Other Revenue'] = df['Total Revenue'] - df['Individual Income Taxes']
-    df['Individual Income Taxes'] = df['Individual Income Taxes'].round(1)
-    df['Other Revenue'] = df['Other Revenue'].round(1)
-    df.drop(columns='Total Revenue', inplace=True)
+    df = pd.merge(leg_changes, deficits, on='Year')
+    df.columns = [c.replace('Budget Year ', '') for c in df.columns]
+    df = df.rename(columns={'Deficit': 'Total Deficit'})
 
     return df[['Year', 'Mandatory', 'Discretionary', 'Individual Income Taxes', 'Other Revenue', 'Total Deficit']]
 
 
-def make_infographic_b1_data(projection_years, start_year=1993):
+def make_infographic_b1_data(projection_years, start_year=1993, database_file=None, output_path=OUTPUT_PATH):
     """Make the data for Infographic B-1.
 
-    Makes calls to make_projection_errors_data.
+    Makes calls to make_derived_data.
 
     Parameters
     ----------
@@ -443,95 +664,37 @@ def make_infographic_b1_data(projection_years, start_year=1993):
         Which projection years to extract from the errors data.
     start_year : int, optional
         Start of projected_fiscal_year to extract from the errors data, by default 1993
+    database_file : str, optional
+        SQLite database to read the output data from (see `store.build_store()`),
+        by default None (the output CSV files are read)
+    output_path : str, optional
+        Directory of the output CSV files, by default OUTPUT_PATH
 
     Returns
     -------
     pd.DataFrame
     """
-    dfs = {}
-    # Create leg effects DataFrames
-    dfs['Mandatory'] = make_projection_errors_data(
-        'outlay',
-        projection_years,
-        category='Mandatory',
-        subcategory='Total Mandatory',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False
-    )
-
-    dfs['Discretionary'] = make_projection_errors_data(
-        'outlay',
-        projection_years,
-        category='Discretionary',
-        subcategory='Total Discretionary',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False
-    )
-
-    dfs['Net Interest'] = make_projection_errors_data(
-        'outlay',
-        projection_years,
-        category='Net Interest',
-        subcategory='Net Interest',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False
-    )
+    components = ['Mandatory', 'Discretionary', 'Net Interest', 'Individual Income Taxes', 'Other Revenue']
 
-    dfs['Total Revenue'] = make_projection_errors_data(
-        'revenue',
+    # Leg effects data
+    df = make_derived_data(
+        components,
         projection_years,
-        category='Total',
-        subcategory='Total',
         start_year=start_year,
         leg_changes=True,
-        calc_averages=False,
-        apply_rounding=False
+        database_file=database_file,
+        output_path=output_path
     )
 
-    dfs['Individual Income Taxes'] = make_projection_errors_data(
-        'revenue',
-        projection_years,
-        category='Individual Income Taxes',
-        subcategory='Individual Income Taxes',
-        start_year=start_year,
-        leg_changes=True,
-        calc_averages=False,
-        apply_rounding=False
-    )
-
-    # Rename the columns in each DataFrame so they have the component/category name in them
-    for k, v in dfs.items():
-        for c in v.columns:
-            if c != 'Year':
-                v.rename(columns={c: f"{c} {k}"}, inplace=True)
-
-    # Merge the DataFrames on Year
-    df = reduce(lambda left, right: pd.merge(left, right, on='Year'), dfs.values())
-
-    # Calculate the "Other Revenue" category for all years
     for year in ['Budget Year', 'Year 6', 'Year 11']:
-        df[f"{year} Total Revenue"] = df[f"{year} Total Revenue"] * -1
-        df[f"{year} Individual Income Taxes"] = df[f"{year} Individual Income Taxes"] * -1
-        df[f"{year} Other Revenue"] = df[f"{year} Total Revenue"] - df[f"{year} Individual Income Taxes"]
-        df.drop(columns=[f"{year} Total Revenue"], inplace=True)
-
         for measure in ['Individual Income Taxes', 'Other Revenue']:
-            df[f"{year} {measure}"] = df[f"{year} {measure}"].round(1)
             # Set revenue components to NaN if the mandatory component is NaN
             df[f"{year} {measure}"] = df[f"{year} {measure}"].where(df[f"{year} Mandatory"].notna(), other=np.nan)
 
     # Select the columns to write out
     out_cols = ['Year']
     for year in ['Budget Year', 'Year 6', 'Year 11']:
-        for component in [
-            'Mandatory',
-            'Discretionary',
-            'Net Interest',
-            'Individual Income Taxes',
-            'Other Revenue']:
+        for component in components:
             out_cols.append(f"{year} {component}")
 
     return df[out_cols]
@@ -0,0 +1,118 @@
+from contextlib import nullcontext
+from validate import components, validate_inputs
+from merge import merge_data
+from errors import calc_errors
+from summary import calc_summary_stats, select_published_stats
+from scale import scale_actuals
+from metrics import timed
+
+
+def evaluate(actuals, baselines, changes, GDP, components=components, validate=True):
+    """
+    Evaluate CBO's projections of the given budgetary components.
+
+    This function does the same analysis as `main.py`, in memory: it does
+    not read or write any files.
+
+    Parameters
+    ----------
+    actuals, baselines, changes, GDP : pandas.DataFrame
+        The input data, with the columns of the files in `input_data`
+        (`actuals.csv`, `baselines.csv`, `baseline_changes.csv`, and
+        `actual_GDP.csv`)
+
+    components : list of str, optional
+        The components evaluated ("outlay", "revenue", "deficit", "debt")
+        (default is components, defined in validate.py)
+
+    validate : bool, optional
+        Whether to check the input data first (see
+        `validate.validate_inputs()`) (default is True)
+
+    Returns
+    -------
+    dict
+        A dictionary of results (see `evaluate_component()`), keyed by
+        component
+
+    Raises
+    ------
+    AssertionError
+        If a component is invalid, or if the input data fail validation
+    """
+    dfs = (actuals, baselines, changes, GDP)
+
+    if validate:
+        validate_inputs(dfs)
+
+    scaled_actuals = scale_actuals(actuals, GDP)
+
+    results = {
+        component: evaluate_component(dfs, component, scaled_actuals)
+        for component in components
+    }
+
+    return results
+
+
+def evaluate_component(dfs, component, scaled_actuals, run=None):
+    """
+    Evaluate CBO's projections of a budgetary component.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    component : str
+        The component evaluated ("outlay", "revenue", "deficit", "debt")
+
+    scaled_actuals : pandas.DataFrame
+        Actual values as a percent of GDP, created by
+        `scale.scale_actuals()`
+
+    run : dict, optional
+        A run whose metrics are recorded (see `metrics.start_run()`); by
+        default, no metrics are recorded
+
+    Returns
+    -------
+    dict
+        A dictionary with the results of the component:
+            - projection_errors: created by `errors.calc_errors()`
+            - summary_stats: the published summary statistics (see
+              `summary.select_published_stats()`)
+            - seasonal_stats: the summary statistics of every season
+              evaluated, created by `summary.calc_summary_stats()`
+            - scaled_actuals: the component's actual values as a percent
+              of GDP
+
+    Raises
+    ------
+    AssertionError
+        If the component is invalid
+    """
+    assert component in components, f"Invalid component {component!r}."
+
+    if run is None:
+        timer = nullcontext({})
+    else:
+        timer = timed(run, "component_analyzed", component=component)
+
+    with timer as event:
+        projection_data = merge_data(dfs, component)
+        projection_errors = calc_errors(projection_data, component)
+        seasonal_stats = calc_summary_stats(projection_errors, component)
+        event["merged_rows"] = len(projection_data)
+        event["error_rows"] = len(projection_errors)
+        event["summary_rows"] = len(seasonal_stats)
+
+    results = {
+        "projection_errors": projection_errors,
+        "summary_stats": select_published_stats(seasonal_stats, component),
+        "seasonal_stats": seasonal_stats,
+        "scaled_actuals": scaled_actuals.loc[scaled_actuals["component"] == component, :],
+    }
+
+    return results
@@ -0,0 +1,201 @@
+import os
+import numpy as np
+import pandas as pd
+from distribution import calc_error_quantiles
+from errors import error_signs, error_measures, calc_actuals_from_errors
+from summary import seasons
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
+
+band_percentiles = [10, 25, 50, 75, 90]
+
+key_cols = ["component", "category", "subcategory", "projected_year_number"]
+
+
+def read_errors(components):
+    """
+    Read the projection errors written by `main.py` for the given
+    budgetary components.
+
+    Parameters
+    ----------
+    components : list of str
+        The components for which projection errors are read
+        ("outlay", "revenue", "deficit", "debt")
+
+    Returns
+    -------
+    dict
+        A dictionary of DataFrames containing the projection errors,
+        keyed by component
+    """
+    errors = {
+        component: pd.read_csv(f"{OUTPUT_PATH}/{component}_projection_errors.csv")
+        for component in components
+    }
+
+    return errors
+
+
+def calc_band_quantiles(errors, band_percentiles=band_percentiles, seasons=seasons):
+    """
+    Calculate the quantiles of the historical projection errors needed for
+    uncertainty bands.
+
+    Parameters
+    ----------
+    errors : dict
+        A dictionary of DataFrames containing disaggregated projection
+        errors, keyed by component (for example, the result of
+        `read_errors()`)
+
+    band_percentiles : list of int, optional
+        Percentiles of the uncertainty bands
+        (default is band_percentiles, defined above)
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons evaluated for each
+        component; only the first (published) season is used
+        (default is seasons, defined in summary.py)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each component, category, subcategory,
+        and projection year, and one column for each error quantile
+        (`error_q[quantile]`) used by the bands
+
+    Notes
+    -----
+    The error quantiles for each band percentile p are the p/100 and
+    1 - p/100 quantiles, because an actual value can increase or decrease
+    with the projection error, depending on the component.
+
+    The result only depends on the historical errors, so it can be
+    calculated once and passed to `project_bands()` for every new
+    baseline.
+    """
+    percentiles = np.asarray(band_percentiles) / 100
+    quantiles = np.union1d(np.round(percentiles, 10), np.round(1 - percentiles, 10))
+
+    quantile_dfs = []
+    for component, component_errors in errors.items():
+        quantile_df = calc_error_quantiles(
+            component_errors,
+            component,
+            quantiles=quantiles,
+            seasons={component: seasons[component][:1]},
+            error_cols=[error_measures[component]],
+        )
+        quantile_dfs.append(quantile_df)
+
+    band_quantiles = (
+        pd.concat(quantile_dfs, ignore_index=True)
+        .astype({"category": "str", "subcategory": "str"})
+        .pivot(index=key_cols, columns="quantile", values="value")
+    )
+    band_quantiles.columns = [f"error_q{q}" for q in band_quantiles.columns]
+
+    return band_quantiles.reset_index()
+
+
+def project_bands(
+    baseline,
+    components,
+    band_quantiles=None,
+    band_percentiles=band_percentiles,
+):
+    """
+    Project uncertainty bands around a baseline from the historical
+    distributions of projection errors.
+
+    For each component, category, subcategory, and projection year of the
+    baseline, the historical projection errors for that projection year
+    are applied to the baseline projection, producing the percentiles of
+    the implied actual values.
+
+    Parameters
+    ----------
+    baseline : pandas.DataFrame
+        DataFrame containing baseline projections, with the columns of
+        `baselines.csv` (`component`, `category`, `subcategory`,
+        `projected_fiscal_year`, `projected_year_number`, and `value`).
+        A `GDP` column containing projected GDP is required for deficits
+        and debt, whose errors are measured as a percent of GDP.
+
+    components : list of str
+        The components for which bands are projected
+        ("outlay", "revenue", "deficit", "debt")
+
+    band_quantiles : pandas.DataFrame, optional
+        Quantiles of the historical projection errors, created by
+        `calc_band_quantiles()` with the same `band_percentiles`. By
+        default, they are calculated from the projection errors written
+        by `main.py`.
+
+    band_percentiles : list of int, optional
+        Percentiles of the uncertainty bands
+        (default is band_percentiles, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        The baseline projections of the given components, with a
+        `band_[percentile]` column for each band percentile. Bands are
+        missing for projection years without historical errors.
+
+    Notes
+    -----
+    The bands are calculated by inverting the projection error
+    definitions of `calc_errors()` (see `errors.calc_actuals_from_errors()`),
+    for all categories and projection years at once.
+
+    As for the historical errors, the bands reflect projection errors
+    after removing the effects of subsequent legislation, so they do not
+    include the uncertainty from future legislation.
+    """
+    for component in components:
+        assert component in ["outlay", "revenue", "deficit", "debt"], "Invalid component name."
+
+    if band_quantiles is None:
+        band_quantiles = calc_band_quantiles(read_errors(components), band_percentiles)
+
+    baseline = baseline.loc[baseline["component"].isin(components), :]
+    bands = pd.merge(
+        baseline.astype({"category": "str", "subcategory": "str"}),
+        band_quantiles,
+        how="left",
+        on=key_cols,
+    )
+
+    percentiles = np.asarray(band_percentiles) / 100
+    lower_cols = [f"error_q{q}" for q in np.round(percentiles, 10)]
+    upper_cols = [f"error_q{q}" for q in np.round(1 - percentiles, 10)]
+
+    # Actual values increase with projection errors measured as actual
+    # minus projected values, and decrease with the others
+    increasing = (bands["component"].map(error_signs) == -1).to_numpy()
+    errors = np.where(
+        increasing[:, np.newaxis],
+        bands[lower_cols].to_numpy(),
+        bands[upper_cols].to_numpy(),
+    )
+
+    projection = bands["value"].to_numpy()[:, np.newaxis]
+    band_values = np.full(errors.shape, np.nan)
+    for component in components:
+        rows = (bands["component"] == component).to_numpy()
+        GDP = None
+        if error_measures[component] == "projection_error_pct_GDP":
+            assert "GDP" in bands.columns, "Projected GDP is required for deficit and debt bands."
+            GDP = bands.loc[rows, "GDP"].to_numpy()[:, np.newaxis]
+
+        band_values[rows] = calc_actuals_from_errors(
+            projection[rows], errors[rows], component, GDP
+        )
+
+    bands = bands.drop(columns=lower_cols + upper_cols)
+    bands[[f"band_{p}" for p in band_percentiles]] = band_values
+
+    return bands
@@ -0,0 +1,294 @@
+import ast
+from functools import lru_cache
+import hashlib
+import inspect
+import os
+import pandas as pd
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+CACHE_PATH = os.path.abspath(f"{CURRENT_PATH}/../cache")
+
+# Largest total size (in bytes) of the cached results; the least recently
+# used results are removed beyond it
+max_cache_bytes = 500 * 1024**2
+
+
+def hash_value(value, digest):
+    """
+    Add the contents of a function argument to a hash.
+
+    Parameters
+    ----------
+    value : object
+        Function argument: a DataFrame, a list, tuple, or dict of
+        arguments, or any other value with a deterministic `repr()`
+
+    digest : hashlib hash object
+        Hash updated in place
+
+    Returns
+    -------
+    None
+    """
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.columns), list(value.dtypes.astype(str)))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            hash_value(item, digest)
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode())
+        for key, item in value.items():
+            hash_value(key, digest)
+            hash_value(item, digest)
+    else:
+        digest.update(repr(value).encode())
+
+    return None
+
+
+def find_dependencies(filepath, code_path=CURRENT_PATH):
+    """
+    Find the source files of a module and of the modules it imports from
+    the source directory, recursively.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the source file of the module
+
+    code_path : str, optional
+        Path to the directory of the source files; modules imported from
+        elsewhere (such as pandas) are not dependencies
+        (default is CURRENT_PATH, defined above)
+
+    Returns
+    -------
+    list of str
+        Paths to the source files, starting with `filepath`
+    """
+    dependencies = [os.path.abspath(filepath)]
+
+    for dependency in dependencies:
+        with open(dependency, encoding="utf-8") as file:
+            tree = ast.parse(file.read())
+
+        module_names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+                # The imported names can be modules of a package
+                module_names += [node.module]
+                module_names += [f"{node.module}.{alias.name}" for alias in node.names]
+
+        for module_name in module_names:
+            module_path = os.path.join(code_path, *module_name.split("."))
+            for module_file in [f"{module_path}.py", os.path.join(module_path, "__init__.py")]:
+                if os.path.isfile(module_file) and module_file not in dependencies:
+                    dependencies.append(module_file)
+
+    return dependencies
+
+
+@lru_cache(maxsize=None)
+def hash_code(filepath, code_path=CURRENT_PATH):
+    """
+    Calculate the version of the code of a module: a hash of its source
+    file and of the source files it depends on.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the source file of the module
+
+    code_path : str, optional
+        Path to the directory of the source files (see
+        `find_dependencies()`) (default is CURRENT_PATH, defined above)
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 hash of the names and contents of the source
+        files of the module and its dependencies
+
+    Notes
+    -----
+    Versions are calculated once for each process, so they are the
+    versions of the code that runs, even if the files are edited later.
+    """
+    digest = hashlib.sha256()
+    for dependency in sorted(find_dependencies(filepath, code_path)):
+        digest.update(os.path.relpath(dependency, code_path).encode())
+        with open(dependency, "rb") as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def hash_call(function, args):
+    """
+    Calculate the content address of a function call.
+
+    Parameters
+    ----------
+    function : function
+        The function called
+
+    args : tuple
+        Arguments of the call
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 hash of the version of the function's module
+        (see `hash_code()`), the function's source code, and the contents
+        of its arguments
+
+    Notes
+    -----
+    The version of the module covers the functions called by `function`
+    and the module-level defaults it uses, which its own source code does
+    not. Editing modules it does not depend on does not change the hash.
+    """
+    digest = hashlib.sha256()
+    digest.update(hash_code(inspect.getsourcefile(function)).encode())
+    digest.update(f"{function.__module__}.{function.__qualname__}".encode())
+    digest.update(inspect.getsource(function).encode())
+    hash_value(args, digest)
+
+    return digest.hexdigest()
+
+
+def memoize(function, cache_path=CACHE_PATH, max_bytes=max_cache_bytes):
+    """
+    Wrap a pure function so its results are cached on disk.
+
+    Parameters
+    ----------
+    function : function
+        A pure function (one whose result only depends on its arguments)
+
+    cache_path : str, optional
+        Path to the directory of the cached results
+        (default is CACHE_PATH, defined above)
+
+    max_bytes : int, optional
+        Largest total size of the cached results, in bytes
+        (default is max_cache_bytes, defined above)
+
+    Returns
+    -------
+    function
+        A function taking the same (positional) arguments, which returns
+        the cached result when the function was already called with the
+        same arguments
+
+    Notes
+    -----
+    Results are stored in files named by the hash of the version of the
+    function's module (with the modules it imports), the function's source
+    code, and the contents of the arguments
+    (see `hash_call()`), so editing the code or the inputs never reuses a
+    stale result. Files that cannot be read or unpickled (for example,
+    results pickled with other versions of the libraries) are treated as
+    missing, and replaced.
+    Reading a result updates the modification time of its file, which is
+    used to evict the least recently used results (see `evict()`).
+    """
+
+    def memoized(*args):
+        key = hash_call(function, args)
+        filepath = os.path.join(cache_path, f"{function.__name__}-{key}.pkl")
+
+        try:
+            result = pd.read_pickle(filepath)
+            os.utime(filepath)
+            return result
+        except Exception:
+            pass
+
+        result = function(*args)
+
+        os.makedirs(cache_path, exist_ok=True)
+        tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+        try:
+            pd.to_pickle(result, tmp_filepath)
+            os.replace(tmp_filepath, filepath)
+        except BaseException:
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
+        evict(cache_path, max_bytes)
+
+        return result
+
+    memoized.__name__ = function.__name__
+    memoized.__doc__ = function.__doc__
+
+    return memoized
+
+
+def evict(cache_path=CACHE_PATH, max_bytes=max_cache_bytes):
+    """
+    Remove the least recently used cached results beyond a total size.
+
+    Parameters
+    ----------
+    cache_path : str, optional
+        Path to the directory of the cached results
+        (default is CACHE_PATH, defined above)
+
+    max_bytes : int, optional
+        Largest total size of the cached results, in bytes
+        (default is max_cache_bytes, defined above)
+
+    Returns
+    -------
+    list of str
+        Names of the files removed
+    """
+    if not os.path.isdir(cache_path):
+        return []
+
+    entries = []
+    for entry in os.scandir(cache_path):
+        if entry.name.endswith(".pkl"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    # Most recently used first
+    entries.sort(reverse=True)
+
+    removed = []
+    total_bytes = 0
+    for mtime, size, path in entries:
+        total_bytes += size
+        if total_bytes > max_bytes:
+            try:
+                os.remove(path)
+                removed.append(os.path.basename(path))
+            except FileNotFoundError:
+                pass
+
+    return removed
+
+
+def clear_cache(cache_path=CACHE_PATH):
+    """
+    Remove every cached result.
+
+    Parameters
+    ----------
+    cache_path : str, optional
+        Path to the directory of the cached results
+        (default is CACHE_PATH, defined above)
+
+    Returns
+    -------
+    None
+    """
+    evict(cache_path, max_bytes=0)
+
+    return None
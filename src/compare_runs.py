@@ -0,0 +1,316 @@
+import glob
+import os.path
+import sys
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
+
+# Columns identifying the rows of the output files; each file is keyed by
+# the columns it has
+key_cols = [
+    "component",
+    "source",
+    "vintage",
+    "category",
+    "subcategory",
+    "season",
+    "baseline_date",
+    "fiscal_year",
+    "projected_fiscal_year",
+    "projected_year_number",
+    "projected_year_number_1",
+    "projected_year_number_2",
+]
+
+# Largest absolute difference of numeric values that is not reported
+tolerance = 1e-6
+
+# Maximum number of changed values printed for each file
+max_rows = 5
+
+
+def read_run(output_path):
+    """
+    Read the output files of a run of `main.py`.
+
+    Parameters
+    ----------
+    output_path : str
+        Path to the directory of the output files
+
+    Returns
+    -------
+    dict
+        A dictionary of DataFrames, keyed by file name
+    """
+    filepaths = sorted(glob.glob(os.path.join(output_path, "*.csv")))
+
+    with ThreadPoolExecutor() as pool:
+        dfs = pool.map(pd.read_csv, filepaths)
+
+    return {os.path.basename(filepath): df for filepath, df in zip(filepaths, dfs)}
+
+
+def diff_frames(old, new, key_cols=key_cols, tolerance=tolerance):
+    """
+    Compare two versions of an output file, aligned on their keys.
+
+    Parameters
+    ----------
+    old, new : pandas.DataFrame
+        The previous and new versions of the file
+
+    key_cols : list of str, optional
+        Columns identifying the rows; the columns of `key_cols` that both
+        versions have are used
+        (default is key_cols, defined above)
+
+    tolerance : float, optional
+        Largest absolute difference of numeric values that is not reported
+        (default is tolerance, defined above)
+
+    Returns
+    -------
+    added : pandas.DataFrame
+        Keys of the rows only in the new version
+
+    removed : pandas.DataFrame
+        Keys of the rows only in the previous version
+
+    changes : pandas.DataFrame
+        Long-format DataFrame with one row for each changed value, with the
+        key columns and the columns:
+            - column: name of the changed column
+            - old_value, new_value: the previous and new values
+            - difference: new_value minus old_value (missing for
+              non-numeric values)
+
+    Raises
+    ------
+    AssertionError
+        If the keys do not identify the rows of either version
+
+    Notes
+    -----
+    The key columns of both versions are encoded together as integers, and
+    the rows of the new version are looked up in a hash table of the keys
+    of the previous version (`pandas.Index.get_indexer()`), so the versions
+    are aligned in a single pass. Each column is then compared on whole
+    arrays. Missing values are equal to each other. Columns only in one
+    version are not compared.
+    """
+    keys = [col for col in key_cols if col in old.columns and col in new.columns]
+    old_keys, new_keys = encode_keys(old, new, keys)
+    for name, encoded_keys in [("previous", old_keys), ("new", new_keys)]:
+        assert_message = f"The keys {keys} do not identify the rows of the {name} version."
+        assert encoded_keys.is_unique, assert_message
+
+    # Position in the previous version of each row of the new version
+    old_positions = old_keys.get_indexer(new_keys)
+    matched = old_positions >= 0
+    in_new = np.zeros(len(old), dtype="bool")
+    in_new[old_positions[matched]] = True
+
+    added = new.loc[~matched, keys].reset_index(drop=True)
+    removed = old.loc[~in_new, keys].reset_index(drop=True)
+
+    # Rows of both versions with the same keys, in the order of the new one
+    new_rows = np.flatnonzero(matched)
+    old_rows = old_positions[matched]
+
+    value_cols = [col for col in old.columns if col in new.columns and col not in keys]
+
+    change_dfs = []
+    for col in value_cols:
+        old_values = old[col].to_numpy()[old_rows]
+        new_values = new[col].to_numpy()[new_rows]
+        missing = pd.isna(old_values) & pd.isna(new_values)
+
+        if pd.api.types.is_numeric_dtype(old[col]) and pd.api.types.is_numeric_dtype(new[col]):
+            differences = new_values.astype("float") - old_values.astype("float")
+            changed = ~missing & ~(np.abs(differences) <= tolerance)
+        else:
+            differences = np.full(len(new_rows), np.nan)
+            changed = ~missing & (old_values.astype("str") != new_values.astype("str"))
+
+        if changed.any():
+            change_df = new.iloc[new_rows[changed], :][keys].reset_index(drop=True)
+            change_df["column"] = col
+            change_df["old_value"] = old_values[changed].astype("object")
+            change_df["new_value"] = new_values[changed].astype("object")
+            change_df["difference"] = differences[changed]
+            change_dfs.append(change_df)
+
+    if len(change_dfs) > 0:
+        changes = pd.concat(change_dfs, ignore_index=True)
+    else:
+        changes = pd.DataFrame(columns=keys + ["column", "old_value", "new_value", "difference"])
+
+    return added, removed, changes
+
+
+def encode_keys(old, new, keys):
+    """
+    Encode the keys of two versions of an output file as integers.
+
+    Parameters
+    ----------
+    old, new : pandas.DataFrame
+        The previous and new versions of the file
+
+    keys : list of str
+        Columns identifying the rows of both versions
+
+    Returns
+    -------
+    old_keys, new_keys : pandas.Index
+        The key of each row of `old` and `new`, equal for equal keys
+
+    Notes
+    -----
+    Each key column is factorized over both versions, and the codes of the
+    columns are combined into a single integer, re-factorizing the
+    combination whenever it could overflow.
+    """
+    combined = np.zeros(len(old) + len(new), dtype="int64")
+    num_combined = 1
+
+    for col in keys:
+        codes, uniques = pd.factorize(pd.concat([old[col], new[col]], ignore_index=True))
+        num_codes = len(uniques) + 1
+
+        if num_combined * num_codes >= 2**62:
+            combined, combined_uniques = pd.factorize(combined)
+            num_combined = len(combined_uniques)
+
+        # Missing values (code -1) are encoded as a value of their own
+        combined = combined * num_codes + codes + 1
+        num_combined *= num_codes
+
+    return pd.Index(combined[: len(old)]), pd.Index(combined[len(old) :])
+
+
+def diff_runs(old_path, new_path=OUTPUT_PATH, tolerance=tolerance):
+    """
+    Compare the output files of two runs of `main.py`.
+
+    Parameters
+    ----------
+    old_path : str
+        Path to the directory of the previous output files (for example, a
+        copy of the last published `output_data`)
+
+    new_path : str, optional
+        Path to the directory of the new output files
+        (default is OUTPUT_PATH, defined above)
+
+    tolerance : float, optional
+        Largest absolute difference of numeric values that is not reported
+        (default is tolerance, defined above)
+
+    Returns
+    -------
+    summary : pandas.DataFrame
+        DataFrame with one row for each file and component, with the
+        columns:
+            - file: name of the output file
+            - component
+            - added_rows, removed_rows: number of keys only in the new or
+              previous run (every row, for files only in one run)
+            - changed_rows: number of rows with changed values
+            - changed_values: number of changed values
+            - largest_change: largest absolute difference of the numeric
+              values
+
+    changes : dict
+        A dictionary of the changed values of each file (see
+        `diff_frames()`), keyed by file name
+
+    problems : dict
+        A dictionary of the files that could not be compared (for example,
+        because their keys do not identify their rows), with the reason,
+        keyed by file name
+    """
+    old_run = read_run(old_path)
+    new_run = read_run(new_path)
+
+    summary_dfs = []
+    changes = {}
+    problems = {}
+    for filename in sorted(set(old_run) | set(new_run)):
+        empty = pd.DataFrame(columns=["component", "difference"])
+        if filename not in new_run:
+            added, removed, file_changes = empty, old_run[filename], empty
+        elif filename not in old_run:
+            added, removed, file_changes = new_run[filename], empty, empty
+        else:
+            try:
+                added, removed, file_changes = diff_frames(
+                    old_run[filename], new_run[filename], tolerance=tolerance
+                )
+            except AssertionError as error:
+                problems[filename] = str(error)
+                continue
+        changes[filename] = file_changes
+
+        keys = [col for col in key_cols if col in file_changes.columns and col != "component"]
+        counts = {
+            "added_rows": added.groupby("component").size(),
+            "removed_rows": removed.groupby("component").size(),
+            "changed_rows": file_changes.drop_duplicates(["component"] + keys)
+            .groupby("component")
+            .size(),
+            "changed_values": file_changes.groupby("component").size(),
+            "largest_change": file_changes["difference"]
+            .astype("float")
+            .abs()
+            .groupby(file_changes["component"])
+            .max(),
+        }
+
+        # Files without changed numeric values have a largest change of 0
+        file_summary = pd.DataFrame(counts).rename_axis("component").reset_index().fillna(0)
+        file_summary.insert(0, "file", filename)
+        if len(file_summary) > 0:
+            summary_dfs.append(file_summary)
+
+    count_cols = ["added_rows", "removed_rows", "changed_rows", "changed_values"]
+    if len(summary_dfs) > 0:
+        summary = pd.concat(summary_dfs, ignore_index=True)
+    else:
+        summary = pd.DataFrame(columns=["file", "component"] + count_cols + ["largest_change"])
+    summary[count_cols] = summary[count_cols].fillna(0).astype("int")
+
+    return summary, changes, problems
+
+
+if __name__ == "__main__":
+    assert_message = "Usage: python src/compare_runs.py [previous output directory] [new output directory]"
+    assert len(sys.argv[1:]) in [1, 2], assert_message
+
+    summary, changes, problems = diff_runs(*sys.argv[1:])
+
+    if len(summary) > 0:
+        print(summary.to_string(index=False))
+    elif len(problems) == 0:
+        print("No differences.")
+
+    for filename, file_changes in changes.items():
+        if len(file_changes) > 0:
+            print(f"\n{filename}: {len(file_changes)} changed values, first:")
+            print(file_changes.head(max_rows).to_string(index=False))
+
+    for filename, problem in problems.items():
+        print(f"\n{filename} could not be compared: {problem}")
+
+    # New keys (such as the errors of a new baseline or fiscal year) are
+    # expected; removed keys, changed values, and files that cannot be
+    # compared are not
+    unexpected = summary["removed_rows"].sum() + summary["changed_values"].sum()
+    if unexpected > 0:
+        print(f"\n{unexpected} removed rows or changed values.")
+    if unexpected > 0 or len(problems) > 0:
+        sys.exit(1)
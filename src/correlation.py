@@ -0,0 +1,184 @@
+import os.path
+import sys
+import numpy as np
+import pandas as pd
+from data_io import write_csv
+from errors import error_measures
+from merge import add_optional_keys
+from summary import seasons, stack_seasons
+from bands import read_errors
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
+
+series_cols = ["component", "category", "subcategory", "season"]
+
+
+def make_error_cube(errors, component, seasons=seasons, series_cols=series_cols):
+    """
+    Arrange the projection errors of every series into a series by vintage
+    by projection year array.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined in summary.py)
+
+    series_cols : list of str, optional
+        A list of columns identifying the series
+        (default is series_cols, defined above)
+
+    Returns
+    -------
+    keys : pandas.DataFrame
+        The `series_cols` values of each series, in sorted order
+
+    projection_years : numpy.ndarray
+        The projection years (`projected_year_number`), in increasing order
+
+    cube : numpy.ndarray
+        Array of shape (series, baselines, projection years) with the
+        errors of each series. Errors for projection years that are not
+        yet known, and for baselines without the series, are missing.
+
+    Notes
+    -----
+    This is `simulate.make_error_matrix()` for all series at once: the rows
+    are placed with a single scatter, rather than pivoting each series.
+    """
+    series_cols = add_optional_keys(series_cols, errors)
+    error_col = error_measures[component]
+
+    stacked_errors = stack_seasons(errors, component, seasons)
+    stacked_errors = stacked_errors.loc[stacked_errors[error_col].notna(), :]
+
+    series_idx = stacked_errors.groupby(series_cols, observed=True, sort=True).ngroup().to_numpy()
+    keys = (
+        stacked_errors[series_cols]
+        .drop_duplicates()
+        .sort_values(series_cols)
+        .reset_index(drop=True)
+    )
+    baseline_idx, _ = pd.factorize(stacked_errors["baseline_date"], sort=True)
+    year_idx, projection_years = pd.factorize(stacked_errors["projected_year_number"], sort=True)
+
+    cube = np.full((len(keys), baseline_idx.max() + 1, len(projection_years)), np.nan)
+    cube[series_idx, baseline_idx, year_idx] = stacked_errors[error_col].to_numpy(dtype="float")
+
+    return keys, np.asarray(projection_years), cube
+
+
+def calc_horizon_correlations(
+    errors,
+    component,
+    seasons=seasons,
+    series_cols=series_cols,
+    min_periods=3,
+):
+    """
+    Calculate the covariance and correlation of projection errors across
+    projection years of the same baseline, for every series of a given
+    budgetary component.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined in summary.py)
+
+    series_cols : list of str, optional
+        A list of columns identifying the series
+        (default is series_cols, defined above)
+
+    min_periods : int, optional
+        Minimum number of baselines with errors for both projection years;
+        the covariance and correlation of pairs with fewer are missing
+        (default is 3)
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long-format DataFrame with one row for each series and pair of
+        projection years, with the columns:
+            - series_cols
+            - projected_year_number_1, projected_year_number_2: the pair of
+              projection years
+            - number_of_projections: number of baselines with errors for
+              both projection years
+            - covariance: sample covariance of the errors
+            - correlation: correlation of the errors
+
+    Notes
+    -----
+    Like `pandas.DataFrame.cov()` and `pandas.DataFrame.corr()`, each pair
+    uses the baselines with errors for both projection years (pairwise
+    complete observations). The sums over those baselines are calculated
+    for every series and pair at once, as products of the error and
+    availability matrices, so no series is handled separately. Errors are
+    centered on the average of each projection year first, which does not
+    change the results but keeps the sums accurate.
+    """
+    keys, projection_years, cube = make_error_cube(errors, component, seasons, series_cols)
+    num_years = len(projection_years)
+
+    available = (~np.isnan(cube)).astype("float")
+    with np.errstate(invalid="ignore"):
+        centered = cube - np.nanmean(cube, axis=1, keepdims=True)
+    centered = np.where(available > 0, centered, 0.0)
+
+    # Sums over the baselines with errors for both projection years i and j
+    counts = np.einsum("svi,svj->sij", available, available)
+    sums = np.einsum("svi,svj->sij", centered, available)
+    squared_sums = np.einsum("svi,svj->sij", centered**2, available)
+    cross_sums = np.einsum("svi,svj->sij", centered, centered)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # `sums` and `squared_sums` are of year i; their transposes of year j
+        covariance = (cross_sums - sums * sums.transpose(0, 2, 1) / counts) / (counts - 1)
+        variances = (squared_sums - sums**2 / counts) / (counts - 1)
+        correlation = covariance / np.sqrt(variances * variances.transpose(0, 2, 1))
+
+    too_few = counts < max(min_periods, 2)
+    covariance[too_few] = np.nan
+    correlation[too_few] = np.nan
+    correlation = np.clip(correlation, -1, 1)
+
+    correlation_df = keys.loc[keys.index.repeat(num_years**2), :].reset_index(drop=True)
+    correlation_df["projected_year_number_1"] = np.tile(np.repeat(projection_years, num_years), len(keys))
+    correlation_df["projected_year_number_2"] = np.tile(projection_years, num_years * len(keys))
+    correlation_df["number_of_projections"] = counts.ravel().astype("int")
+    correlation_df["covariance"] = covariance.ravel()
+    correlation_df["correlation"] = correlation.ravel()
+
+    return correlation_df
+
+
+if __name__ == "__main__":
+    components = sys.argv[1:] if len(sys.argv[1:]) > 0 else ["outlay", "revenue", "deficit", "debt"]
+
+    errors = read_errors(components)
+    correlations = pd.concat(
+        [calc_horizon_correlations(errors[component], component) for component in components],
+        ignore_index=True,
+    )
+
+    filepath = f"{OUTPUT_PATH}/horizon_correlations.csv"
+    write_csv(correlations, filepath, index=False, float_format="%.3f")
+    print(f"Horizon correlations written to: {filepath}")
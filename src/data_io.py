@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import pandas as pd
+from summary import seasons, select_published_stats
+
+input_files = {
+    "actuals": "actuals.csv",
+    "baselines": "baselines.csv",
+    "changes": "baseline_changes.csv",
+    "GDP": "actual_GDP.csv",
+}
+
+
+def read_inputs(input_path, input_files=input_files):
+    """
+    Read the input data files concurrently.
+
+    Parameters
+    ----------
+    input_path : str
+        Path to the directory containing the input data files
+
+    input_files : dict, optional
+        A dictionary containing the file names of the input data
+        (default is input_files, defined above)
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The input DataFrames, in the order of `input_files`:
+        (actuals, baselines, changes, GDP)
+
+    Notes
+    -----
+    Each file is read in its own thread, so reading the files overlaps
+    instead of happening one after another.
+    """
+    with ThreadPoolExecutor(max_workers=len(input_files)) as pool:
+        futures = [
+            pool.submit(pd.read_csv, os.path.join(input_path, filename))
+            for filename in input_files.values()
+        ]
+
+        return tuple(future.result() for future in futures)
+
+
+def write_csv(df, filepath, **kwargs):
+    """
+    Write a DataFrame to a CSV file atomically.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame to write out
+
+    filepath : str
+        Path of the CSV file to write
+
+    **kwargs
+        Keyword arguments passed to `pandas.DataFrame.to_csv()`
+
+    Returns
+    -------
+    int
+        Size of the CSV file written to disk, in bytes
+
+    Notes
+    -----
+    The data are written to a temporary file in the same directory, which
+    is flushed to disk and then renamed to `filepath`. Readers of
+    `filepath` therefore never see a partially written file. If writing
+    fails, the temporary file is removed and the exception is raised.
+
+    This function is safe to call from a writer thread pool, as long as
+    each call writes to a different `filepath`.
+    """
+    tmp_filepath = f"{filepath}.tmp"
+
+    try:
+        with open(tmp_filepath, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, **kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+            num_bytes = os.fstat(f.fileno()).st_size
+
+        os.replace(tmp_filepath, filepath)
+
+    except BaseException:
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+        raise
+
+    return num_bytes
+
+
+def submit_outputs(
+    writer_pool,
+    output_path,
+    component,
+    projection_errors,
+    seasonal_stats,
+    scaled_actuals,
+    seasons=seasons,
+):
+    """
+    Submit the writes of the output files of a budgetary component to a
+    writer thread pool.
+
+    Parameters
+    ----------
+    writer_pool : concurrent.futures.ThreadPoolExecutor
+        Thread pool writing the output files
+
+    output_path : str
+        Path to the directory of the output files
+
+    component : str
+        The component whose output files are written
+        ("outlay", "revenue", "deficit", "debt")
+
+    projection_errors : pandas.DataFrame
+        Projection errors, created by `errors.calc_errors()`
+
+    seasonal_stats : pandas.DataFrame
+        Summary statistics for each season, created by
+        `summary.calc_summary_stats()`
+
+    scaled_actuals : pandas.DataFrame
+        Actual values as a percent of GDP, created by
+        `scale.scale_actuals()`
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons evaluated for each
+        component (default is seasons, defined in summary.py)
+
+    Returns
+    -------
+    dict
+        The submitted writes (concurrent.futures.Future), keyed by the
+        path of the file written; their results (the sizes of the files,
+        in bytes) must be checked to make sure the files were written
+    """
+    outputs = [
+        (projection_errors, "projection_errors", "%.3f"),
+        (
+            select_published_stats(seasonal_stats, component, seasons),
+            "projection_errors_summary_stats",
+            "%.1f",
+        ),
+    ]
+    if len(seasons[component]) > 1:
+        outputs.append((seasonal_stats, "projection_errors_summary_stats_by_season", "%.1f"))
+    outputs.append(
+        (
+            scaled_actuals.loc[(scaled_actuals["component"] == component), :],
+            "actuals_pct_GDP",
+            "%.1f",
+        )
+    )
+
+    writes = {}
+    for df, name, float_format in outputs:
+        filepath = os.path.join(output_path, f"{component}_{name}.csv")
+        writes[filepath] = writer_pool.submit(
+            write_csv, df, filepath, index=False, float_format=float_format
+        )
+
+    return writes
@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from merge import add_optional_keys
+from summary import seasons, group_cols, stack_seasons
+
+deciles = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+# Edges of the histogram bins (in percent), with open-ended bins at both ends
+bin_edges = [-np.inf] + list(range(-20, 21)) + [np.inf]
+
+error_cols = ["projection_error_pct_GDP", "projection_error_pct_actual"]
+
+
+def calc_error_quantiles(
+    errors,
+    component,
+    quantiles=deciles,
+    seasons=seasons,
+    group_cols=group_cols,
+    error_cols=error_cols,
+):
+    """
+    Calculate quantiles of the projection errors for a given budgetary
+    component.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    quantiles : list of float, optional
+        The quantiles to calculate, between 0 and 1
+        (default is deciles, defined above)
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined in summary.py)
+
+    group_cols : list of str, optional
+        A list of columns to group by when calculating quantiles
+        (default is group_cols, defined in summary.py)
+
+    error_cols : list of str, optional
+        A list of the projection error columns to analyze; columns not in
+        `errors` are skipped
+        (default is error_cols, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long-format DataFrame with one row for each group, error measure,
+        and quantile, with the columns:
+            - group_cols
+            - error_measure: name of the projection error column
+            - quantile: the quantile calculated
+            - value: value of the quantile
+
+    Notes
+    -----
+    The quantiles are interpolated linearly between the closest ranks, as
+    in `pandas.Series.quantile()`. They are calculated for every group and
+    quantile at once from a single sort of the errors, so calculating many
+    quantiles costs about the same as calculating two.
+    """
+    quantiles = np.asarray(quantiles, dtype="float")
+
+    quantile_dfs = []
+    for error_col in error_cols:
+        if error_col not in errors.columns:
+            continue
+
+        keys, values, starts, counts = sort_errors(
+            errors, component, error_col, seasons, group_cols
+        )
+
+        # Positions of the quantiles within each group's sorted errors
+        positions = (counts[:, np.newaxis] - 1) * quantiles[np.newaxis, :]
+        lower = np.floor(positions).astype("int")
+        upper = np.ceil(positions).astype("int")
+        weights = positions - lower
+
+        lower_values = values[starts[:, np.newaxis] + lower]
+        upper_values = values[starts[:, np.newaxis] + upper]
+        diffs = upper_values - lower_values
+
+        # Same linear interpolation as numpy, which pandas uses for quantiles
+        quantile_values = np.where(
+            weights < 0.5,
+            lower_values + diffs * weights,
+            upper_values - diffs * (1 - weights),
+        )
+
+        quantile_df = keys.loc[keys.index.repeat(len(quantiles)), :].reset_index(drop=True)
+        quantile_df["error_measure"] = error_col
+        quantile_df["quantile"] = np.tile(quantiles, len(keys))
+        quantile_df["value"] = quantile_values.ravel()
+
+        quantile_dfs.append(quantile_df)
+
+    return pd.concat(quantile_dfs, ignore_index=True)
+
+
+def calc_error_histograms(
+    errors,
+    component,
+    bin_edges=bin_edges,
+    seasons=seasons,
+    group_cols=group_cols,
+    error_cols=error_cols,
+):
+    """
+    Calculate fixed-bin histograms of the projection errors for a given
+    budgetary component.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    bin_edges : list of float, optional
+        Increasing edges of the histogram bins; errors outside the first
+        and last edges are not counted
+        (default is bin_edges, defined above)
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined in summary.py)
+
+    group_cols : list of str, optional
+        A list of columns to group by when calculating histograms
+        (default is group_cols, defined in summary.py)
+
+    error_cols : list of str, optional
+        A list of the projection error columns to analyze; columns not in
+        `errors` are skipped
+        (default is error_cols, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long-format DataFrame with one row for each group, error measure,
+        and bin, with the columns:
+            - group_cols
+            - error_measure: name of the projection error column
+            - bin_lower: lower edge of the bin (included in the bin)
+            - bin_upper: upper edge of the bin (excluded from the bin)
+            - count: number of errors in the bin
+    """
+    bin_edges = np.asarray(bin_edges, dtype="float")
+    num_bins = len(bin_edges) - 1
+
+    histogram_dfs = []
+    for error_col in error_cols:
+        if error_col not in errors.columns:
+            continue
+
+        keys, values, starts, counts = sort_errors(
+            errors, component, error_col, seasons, group_cols
+        )
+
+        # Group and bin of each error, counted in a single pass
+        group_idx = np.repeat(np.arange(len(keys)), counts)
+        bin_idx = np.searchsorted(bin_edges, values, side="right") - 1
+        in_bins = (bin_idx >= 0) & (bin_idx < num_bins)
+
+        bin_counts = np.bincount(
+            group_idx[in_bins] * num_bins + bin_idx[in_bins],
+            minlength=len(keys) * num_bins,
+        )
+
+        histogram_df = keys.loc[keys.index.repeat(num_bins), :].reset_index(drop=True)
+        histogram_df["error_measure"] = error_col
+        histogram_df["bin_lower"] = np.tile(bin_edges[:-1], len(keys))
+        histogram_df["bin_upper"] = np.tile(bin_edges[1:], len(keys))
+        histogram_df["count"] = bin_counts
+
+        histogram_dfs.append(histogram_df)
+
+    return pd.concat(histogram_dfs, ignore_index=True)
+
+
+def sort_errors(errors, component, error_col, seasons, group_cols):
+    """
+    Sort the projection errors by group and by value.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    error_col : str
+        Name of the projection error column to sort
+
+    seasons : dict
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+
+    group_cols : list of str
+        A list of columns identifying the groups
+
+    Returns
+    -------
+    keys : pandas.DataFrame
+        The `group_cols` values of each group, in sorted order
+
+    values : numpy.ndarray
+        The errors (without missing values), sorted by group and by value
+
+    starts : numpy.ndarray
+        Position in `values` of the first error of each group
+
+    counts : numpy.ndarray
+        Number of errors in each group
+    """
+    group_cols = add_optional_keys(group_cols, errors)
+    stacked_errors = stack_seasons(errors, component, seasons)
+    stacked_errors = stacked_errors.loc[
+        stacked_errors[error_col].notna(), group_cols + [error_col]
+    ]
+
+    # A single sort puts each group's errors together, in increasing order
+    sorted_errors = stacked_errors.sort_values(group_cols + [error_col])
+
+    codes = sorted_errors.groupby(group_cols, observed=True, sort=False).ngroup()
+    new_group = np.diff(codes.to_numpy(), prepend=-1) != 0
+
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, len(sorted_errors)))
+    keys = sorted_errors.loc[new_group, group_cols].reset_index(drop=True)
+    values = sorted_errors[error_col].to_numpy(dtype="float")
+
+    return keys, values, starts, counts
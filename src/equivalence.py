@@ -0,0 +1,541 @@
+import os.path
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from data_io import read_inputs
+from validate import components
+from merge import merge_data
+from errors import calc_errors
+from summary import (
+    calc_summary_stats,
+    calc_weighted_summary_stats,
+    group_cols,
+    select_published_stats,
+)
+from partition import run_partitioned
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+INPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../input_data")
+
+error_key_cols = ["component", "category", "subcategory", "baseline_date", "projected_fiscal_year"]
+
+summary_key_cols = group_cols
+
+published_key_cols = [col for col in group_cols if col != "season"]
+
+# Columns of the projection errors added since the first version of the
+# program (the economic and technical changes)
+new_error_cols = ("economic_", "technical_", "econ_", "tech_")
+
+# Maximum number of differing rows reported for each comparison
+max_rows = 5
+
+
+def reference_errors(dfs, component):
+    """Projection errors, as calculated by `main.py`."""
+    return calc_errors(merge_data(dfs, component), component)
+
+
+def reference_summary_stats(dfs, component):
+    """Summary statistics, as calculated by `main.py`."""
+    return calc_summary_stats(reference_errors(dfs, component), component)
+
+
+def reference_summary_stats_without_ranges(dfs, component):
+    """Summary statistics, as calculated by `main.py`, without the
+    projection year ranges (which weighted statistics do not have)."""
+    return reference_summary_stats(dfs, component).drop(columns=["projection_year_range"])
+
+
+# The first version of the program (commit b9a91ba), frozen as the reference
+# of the optimized merge and summary statistics. Rows are not sorted, because
+# results are compared aligned on their keys.
+original_agg_cols = [
+    "component",
+    "category",
+    "subcategory",
+    "projected_fiscal_year",
+    "projected_year_number",
+]
+
+original_leg_labels = {
+    "revenue": "legislative_revenue_change",
+    "outlay": "legislative_outlay_change",
+    "deficit": "legislative_deficit_change",
+    "debt": "legislative_deficit_change",
+}
+
+
+def original_merge_data(dfs, component, agg_cols=original_agg_cols, leg_labels=original_leg_labels):
+    """Merged data, as calculated by the first version of `merge.merge_data()`."""
+    actuals, baselines, changes, GDP = dfs
+
+    component_cond = baselines["component"] == component
+    if component == "revenue":
+        baseline_cond = (baselines["Winter_flag"] == True) | (baselines["Spring_flag"] == True)
+    else:
+        baseline_cond = baselines["Spring_flag"] == True
+    relevant_baselines = baselines.loc[component_cond & baseline_cond, :]
+
+    bl_act = pd.merge(
+        relevant_baselines,
+        actuals,
+        how="inner",
+        left_on=["component", "category", "subcategory", "projected_fiscal_year"],
+        right_on=["component", "category", "subcategory", "fiscal_year"],
+    ).drop(columns=["fiscal_year"])
+    bl_act_GDP = pd.merge(
+        bl_act, GDP, how="left", left_on=["projected_fiscal_year"], right_on=["fiscal_year"]
+    ).drop(columns=["fiscal_year"])
+
+    if component == "debt":
+        filtered_changes = changes.loc[changes["component"] == "deficit", :].copy()
+        filtered_changes.loc[:, "component"] = "debt"
+    else:
+        filtered_changes = changes.loc[changes["component"] == component, :]
+    leg_changes = filtered_changes.loc[filtered_changes["change_category"] == "Legislative", :]
+    leg_changes = leg_changes.rename(columns={"value": leg_labels[component]})
+
+    bl_act_leg = pd.merge(
+        bl_act_GDP,
+        leg_changes,
+        how="right",
+        on=["component", "category", "subcategory", "projected_fiscal_year"],
+    )
+    for col in ["changes_baseline_date", "baseline_date"]:
+        bl_act_leg[col] = pd.to_datetime(bl_act_leg[col], format="%Y-%m-%d")
+    bl_act_leg = bl_act_leg.loc[bl_act_leg["changes_baseline_date"] > bl_act_leg["baseline_date"], :]
+
+    bl_act_leg_agg = original_aggregate_leg_changes(bl_act_leg, component, agg_cols, leg_labels)
+
+    agg_cols = agg_cols.copy()
+    if component == "revenue":
+        agg_cols += ["Spring_flag", "Winter_flag"]
+    merged_df = pd.merge(bl_act_GDP, bl_act_leg_agg, how="inner", on=agg_cols)
+
+    cond_1 = merged_df["subcategory"] != "Fannie Freddie"
+    cond_2 = merged_df["projected_year_number"] != 0
+
+    return merged_df.loc[cond_1 & cond_2, :]
+
+
+def original_aggregate_leg_changes(bl_act_leg, component, agg_cols, leg_labels):
+    """Aggregated legislative changes, as calculated by the first version of
+    `merge.aggregate_changes()` (`aggregate_leg_changes()`), with the
+    cumulative debt changes summed row by row."""
+    agg_cols = agg_cols.copy()
+
+    if component == "revenue":
+        agg_cols += ["Spring_flag", "Winter_flag"]
+
+    bl_act_leg_agg = bl_act_leg.groupby(agg_cols)[leg_labels[component]].sum().reset_index()
+
+    if component == "debt":
+        bl_act_leg_agg["baseline_year"] = (
+            bl_act_leg_agg["projected_fiscal_year"]
+            - bl_act_leg_agg["projected_year_number"]
+            + 1
+        ).astype("int")
+
+        bl_act_leg_agg[leg_labels[component]] *= -1
+
+        def calc_cum_deficit_effects(row):
+            cond_1 = bl_act_leg_agg["baseline_year"] == row["baseline_year"]
+            cond_2 = bl_act_leg_agg["projected_year_number"] <= row["projected_year_number"]
+
+            return bl_act_leg_agg.loc[cond_1 & cond_2, leg_labels[component]].sum()
+
+        bl_act_leg_agg["legislative_debt_change"] = bl_act_leg_agg.apply(
+            calc_cum_deficit_effects, axis=1
+        )
+
+        bl_act_leg_agg.drop(columns=["baseline_year"], inplace=True)
+
+    return bl_act_leg_agg
+
+
+def original_calc_errors(merged_data, component):
+    """Projection errors, as calculated by the first version of
+    `errors.calc_errors()`."""
+    merged_data = merged_data.copy()
+
+    merged_data["adjusted_projection"] = (
+        merged_data["value"] + merged_data[f"legislative_{component}_change"]
+    )
+    merged_data["projection_error"] = merged_data["adjusted_projection"] - merged_data["actual_value"]
+    if component == "deficit":
+        merged_data["projection_error"] *= -1
+
+    if component in ["outlay", "revenue"]:
+        merged_data["projection_error_pct_actual"] = (
+            merged_data["projection_error"] / merged_data["actual_value"] * 100
+        )
+    merged_data["leg_change_pct_GDP"] = (
+        merged_data[f"legislative_{component}_change"] / merged_data["GDP"] * 100
+    )
+    merged_data["projection_error_pct_GDP"] = merged_data["projection_error"] / merged_data["GDP"] * 100
+
+    return merged_data
+
+
+def original_calc_summary_stats(errors, component):
+    """Published summary statistics, as calculated by the first version of
+    `summary.calc_summary_stats()`."""
+    errors = errors.copy()
+    group_cols = ["component", "category", "subcategory", "projected_year_number"]
+
+    if component in ["deficit", "debt"]:
+        error_col = "projection_error_pct_GDP"
+    else:
+        error_col = "projection_error_pct_actual"
+
+    if component == "revenue":
+        errors = errors[errors["Winter_flag"] == True]
+
+    errors["projection_year_range"] = (
+        errors.groupby(group_cols, observed=True)["projected_fiscal_year"]
+        .transform(lambda years: f"{years.min()}-{years.max()}")
+    )
+    group_cols.append("projection_year_range")
+
+    summary_stats = errors.groupby(group_cols, observed=True).agg(
+        {
+            error_col: [
+                ("num_projections", "count"),
+                ("average_error", lambda error: error.mean()),
+                ("average_absolute_error", lambda error: abs(error).mean()),
+                ("RMSE", lambda error: ((error ** 2).mean()) ** 0.5),
+                ("two_thirds_spread", lambda error: error.quantile(5/6) - error.quantile(1/6)),
+            ]
+        }
+    )
+    summary_stats.reset_index(inplace=True)
+
+    stats_cols = [
+        "number_of_projections",
+        "average_error",
+        "average_absolute_error",
+        "RMSE",
+        "two_thirds_spread",
+    ]
+    summary_stats.columns = group_cols + stats_cols
+
+    return summary_stats
+
+
+def original_errors(dfs, component):
+    """Projection errors, as calculated by the first version of `main.py`."""
+    return original_calc_errors(original_merge_data(dfs, component), component)
+
+
+def original_summary_stats(dfs, component):
+    """Published summary statistics, as calculated by the first version of
+    `main.py`."""
+    return original_calc_summary_stats(original_errors(dfs, component), component)
+
+
+def merged_errors(dfs, component):
+    """Projection errors, as calculated by `main.py`, without the columns
+    added since the first version."""
+    errors = reference_errors(dfs, component)
+
+    return errors.loc[:, [col for col in errors.columns if not col.startswith(new_error_cols)]]
+
+
+def published_summary_stats(dfs, component):
+    """Published summary statistics, as calculated by `main.py`."""
+    return select_published_stats(reference_summary_stats(dfs, component), component)
+
+
+def partitioned_errors(dfs, component):
+    """Projection errors calculated on four shards."""
+    return run_partitioned(dfs, component, num_shards=4)[0]
+
+
+def partitioned_summary_stats(dfs, component):
+    """Summary statistics calculated on four shards."""
+    return run_partitioned(dfs, component, num_shards=4)[1]
+
+
+def cached_errors(dfs, component):
+    """Projection errors calculated with cached merge steps, run twice so
+    the second run reads every step from the cache."""
+    with tempfile.TemporaryDirectory() as cache_path:
+        merge_data(dfs, component, cache_path=cache_path)
+        projection_data = merge_data(dfs, component, cache_path=cache_path)
+
+    return calc_errors(projection_data, component)
+
+
+def equally_weighted_summary_stats(dfs, component):
+    """Summary statistics calculated by the weighted summary statistics
+    with equal weights."""
+    errors = reference_errors(dfs, component)
+    weights = pd.DataFrame({"equal": 1.0}, index=pd.unique(errors["baseline_date"]))
+    weighted_stats = calc_weighted_summary_stats(errors, component, weights)
+
+    return weighted_stats.drop(columns=["weighting", "effective_number_of_projections"])
+
+
+# Pairs of reference and optimized implementations, with the columns
+# identifying their rows and the float format of their output files
+implementations = {
+    "merge_data": (original_errors, merged_errors, error_key_cols, "%.3f"),
+    "summary_stats": (original_summary_stats, published_summary_stats, published_key_cols, "%.1f"),
+    "partitioned_errors": (reference_errors, partitioned_errors, error_key_cols, "%.3f"),
+    "partitioned_summary_stats": (
+        reference_summary_stats,
+        partitioned_summary_stats,
+        summary_key_cols,
+        "%.1f",
+    ),
+    "cached_errors": (reference_errors, cached_errors, error_key_cols, "%.3f"),
+    "weighted_summary_stats": (
+        reference_summary_stats_without_ranges,
+        equally_weighted_summary_stats,
+        summary_key_cols,
+        "%.1f",
+    ),
+}
+
+
+def make_synthetic_inputs(dfs, seed):
+    """
+    Make randomized synthetic input data from the input data.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    seed : int
+        Seed of the random number generator
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The input DataFrames, in the same order, with:
+            - the actual values, baseline projections, and changes
+              multiplied by random factors (5 percent standard deviation)
+            - a random fifth of the baselines removed
+            - the rows of every DataFrame shuffled
+    """
+    rng = np.random.default_rng(seed)
+    actuals, baselines, changes, GDP = (df.copy() for df in dfs)
+
+    actuals["actual_value"] *= 1 + 0.05 * rng.standard_normal(len(actuals))
+    baselines["value"] *= 1 + 0.05 * rng.standard_normal(len(baselines))
+    changes["value"] *= 1 + 0.05 * rng.standard_normal(len(changes))
+
+    baseline_dates = baselines["baseline_date"].unique()
+    removed_dates = rng.choice(baseline_dates, size=len(baseline_dates) // 5, replace=False)
+    baselines = baselines.loc[~baselines["baseline_date"].isin(removed_dates), :]
+
+    return tuple(
+        df.sample(frac=1, random_state=rng).reset_index(drop=True)
+        for df in [actuals, baselines, changes, GDP]
+    )
+
+
+def format_values(values, float_format):
+    """
+    Format values as they are written by `pandas.DataFrame.to_csv()`.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        Values to format
+
+    float_format : str or None
+        Format of floats (for example, "%.3f"); by default, floats are
+        written with full precision
+
+    Returns
+    -------
+    pandas.Series
+        The formatted values, with missing values as empty strings
+    """
+    if pd.api.types.is_float_dtype(values) and float_format is not None:
+        formatted = values.map(lambda value: float_format % value)
+    else:
+        formatted = values.astype("str")
+
+    return formatted.where(values.notna(), "")
+
+
+def compare_frames(reference, candidate, key_cols, float_format=None, atol=None, max_rows=max_rows):
+    """
+    Compare two DataFrames, aligned on their keys.
+
+    Parameters
+    ----------
+    reference : pandas.DataFrame
+        Results of the reference implementation
+
+    candidate : pandas.DataFrame
+        Results of the implementation checked
+
+    key_cols : list of str
+        Columns identifying the rows of both DataFrames
+
+    float_format : str, optional
+        Format of the floats in the output files (for example, "%.3f");
+        floats differ if they are written differently. By default, floats
+        must be equal.
+
+    atol : float, optional
+        Largest absolute difference of floats that is not reported, in
+        addition to differences in their formatted values; by default,
+        only formatted values are compared
+
+    max_rows : int, optional
+        Maximum number of differing rows reported for each column
+        (default is max_rows, defined above)
+
+    Returns
+    -------
+    list of str
+        Description of each difference found; empty if the DataFrames are
+        equivalent
+
+    Notes
+    -----
+    Rows whose keys are not unique are reported, so results with
+    duplicated rows (such as shards concatenated twice) are not
+    equivalent, even if every row matches a row of the other DataFrame.
+    """
+    problems = []
+
+    missing_cols = [col for col in reference.columns if col not in candidate.columns]
+    extra_cols = [col for col in candidate.columns if col not in reference.columns]
+    if len(missing_cols) > 0:
+        problems.append(f"missing columns {missing_cols}")
+    if len(extra_cols) > 0:
+        problems.append(f"extra columns {extra_cols}")
+
+    if len(reference) != len(candidate):
+        problems.append(f"{len(reference)} reference rows, but {len(candidate)} candidate rows")
+
+    # Align the rows on their keys
+    reference = reference.astype({col: "str" for col in key_cols})
+    candidate = candidate.astype({col: "str" for col in key_cols})
+
+    for df, label in [(reference, "reference"), (candidate, "candidate")]:
+        duplicated = df.duplicated(key_cols, keep=False)
+        if duplicated.any():
+            rows = df.loc[duplicated, key_cols]
+            problems.append(
+                f"{len(rows)} {label} rows with duplicate keys, first:\n"
+                f"{rows.head(max_rows).to_string(index=False)}"
+            )
+
+    reference_keys = reference.set_index(key_cols).index
+    candidate_keys = candidate.set_index(key_cols).index
+    for rows, label in [
+        (reference.loc[~reference_keys.isin(candidate_keys), key_cols], "missing"),
+        (candidate.loc[~candidate_keys.isin(reference_keys), key_cols], "extra"),
+    ]:
+        if len(rows) > 0:
+            problems.append(
+                f"{len(rows)} {label} rows, first:\n{rows.head(max_rows).to_string(index=False)}"
+            )
+
+    both = pd.merge(
+        reference,
+        candidate,
+        how="inner",
+        on=key_cols,
+        suffixes=("_reference", "_candidate"),
+    )
+
+    value_cols = [
+        col for col in reference.columns if col not in key_cols and col in candidate.columns
+    ]
+    for col in value_cols:
+        ref_values = both[f"{col}_reference"]
+        cand_values = both[f"{col}_candidate"]
+
+        differs = format_values(ref_values, float_format) != format_values(cand_values, float_format)
+        if atol is not None and pd.api.types.is_float_dtype(ref_values):
+            differs |= ~np.isclose(ref_values, cand_values, rtol=0, atol=atol, equal_nan=True)
+
+        if differs.any():
+            rows = both.loc[differs, key_cols + [f"{col}_reference", f"{col}_candidate"]]
+            problems.append(
+                f"{differs.sum()} rows differ in {col}, first:\n"
+                f"{rows.head(max_rows).to_string(index=False)}"
+            )
+
+    return problems
+
+
+def check_equivalence(names=None, seeds=(0, 1, 2), components=components, atol=None):
+    """
+    Check that optimized implementations give the same results as their
+    references, on the input data and on randomized synthetic inputs.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        Names of the implementations checked (keys of `implementations`);
+        by default, all of them
+
+    seeds : tuple of int, optional
+        Seeds of the synthetic inputs (see `make_synthetic_inputs()`)
+        (default is (0, 1, 2))
+
+    components : list of str, optional
+        The components checked
+        (default is components, defined in validate.py)
+
+    atol : float, optional
+        Largest absolute difference of floats that is not reported (see
+        `compare_frames()`)
+
+    Returns
+    -------
+    int
+        Number of comparisons with differences; each is printed
+    """
+    if names is None:
+        names = list(implementations)
+
+    dfs = read_inputs(INPUT_PATH)
+    inputs = {"input data": dfs}
+    for seed in seeds:
+        inputs[f"synthetic inputs (seed {seed})"] = make_synthetic_inputs(dfs, seed)
+
+    num_failures = 0
+    for name in names:
+        reference_function, candidate_function, key_cols, float_format = implementations[name]
+        for input_name, input_dfs in inputs.items():
+            for component in components:
+                problems = compare_frames(
+                    reference_function(input_dfs, component),
+                    candidate_function(input_dfs, component),
+                    key_cols,
+                    float_format,
+                    atol,
+                )
+                if len(problems) > 0:
+                    num_failures += 1
+                    print(f"{name}, {component}, {input_name}:")
+                    for problem in problems:
+                        print("  - " + problem.replace("\n", "\n    "))
+
+        print(f"{name}: checked")
+
+    return num_failures
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] if len(sys.argv[1:]) > 0 else None
+    num_failures = check_equivalence(names)
+
+    if num_failures > 0:
+        print(f"\n{num_failures} comparisons found differences.")
+        sys.exit(1)
+
+    print("\nAll implementations are equivalent.")
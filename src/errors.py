@@ -1,3 +1,23 @@
+# Projection errors are projected minus actual values, except for deficits,
+# for which they are actual minus projected values (so that, as for the other
+# components, a positive error means the budgetary outcome was better than
+# projected).
+error_signs = {
+    "outlay": 1,
+    "revenue": 1,
+    "deficit": -1,
+    "debt": 1,
+}
+
+# Measure of the projection errors used to evaluate each component
+error_measures = {
+    "outlay": "projection_error_pct_actual",
+    "revenue": "projection_error_pct_actual",
+    "deficit": "projection_error_pct_GDP",
+    "debt": "projection_error_pct_GDP",
+}
+
+
 def calc_errors(merged_data, component):
     """
     Calculate projection error statistics for a given budgetary component.
@@ -14,6 +34,9 @@ def calc_errors(merged_data, component):
         - projection error as a percent of actual
         - projection error as a percent of GDP
 
+    The legislative, economic, and technical changes made after each
+    baseline are also expressed as a percent of GDP.
+
     Parameters
     ----------
     merged_data : pandas.DataFrame
@@ -40,10 +63,9 @@ def calc_errors(merged_data, component):
         merged_data["adjusted_projection"] - merged_data["actual_value"]
     )
 
-    if component == "deficit":
-        merged_data["projection_error"] *= -1
+    merged_data["projection_error"] *= error_signs[component]
 
-    if component in ["outlay", "revenue"]:
+    if error_measures[component] == "projection_error_pct_actual":
         merged_data["projection_error_pct_actual"] = (
             merged_data["projection_error"] / merged_data["actual_value"] * 100
         )
@@ -52,8 +74,60 @@ def calc_errors(merged_data, component):
         merged_data[f"legislative_{component}_change"] / merged_data["GDP"] * 100
     )
 
+    merged_data["econ_change_pct_GDP"] = (
+        merged_data[f"economic_{component}_change"] / merged_data["GDP"] * 100
+    )
+
+    merged_data["tech_change_pct_GDP"] = (
+        merged_data[f"technical_{component}_change"] / merged_data["GDP"] * 100
+    )
+
     merged_data["projection_error_pct_GDP"] = (
         merged_data["projection_error"] / merged_data["GDP"] * 100
      )
 
     return merged_data
+
+
+def calc_actuals_from_errors(projection, error, component, GDP=None):
+    """
+    Calculate the actual values implied by projections and projection
+    errors for a given budgetary component.
+
+    This function inverts the projection error definitions used in
+    `calc_errors()`, so that projection errors can be applied to new
+    projections.
+
+    Parameters
+    ----------
+    projection : array_like
+        Projected values
+
+    error : array_like
+        Projection errors, measured with `error_measures[component]`
+        (as a percent of actual or as a percent of GDP)
+
+    component : str
+        The fiscal component of the projections
+        ("outlay", "revenue", "deficit", or "debt")
+
+    GDP : array_like, optional
+        GDP in the projected fiscal years; required when the errors are
+        measured as a percent of GDP
+
+    Returns
+    -------
+    array_like
+        The actual values implied by the projections and errors, broadcast
+        across the shapes of the inputs
+    """
+    sign = error_signs[component]
+
+    if error_measures[component] == "projection_error_pct_actual":
+        # error = sign * (projection - actual) / actual * 100
+        return projection / (1 + sign * error / 100)
+
+    assert GDP is not None, "GDP is required for errors as a percent of GDP."
+
+    # error = sign * (projection - actual) / GDP * 100
+    return projection - sign * error * GDP / 100
@@ -0,0 +1,345 @@
+import numpy as np
+import pandas as pd
+import yaml
+from merge import HIERARCHY_FILE
+from validate import key_cols
+
+node_cols = ["component", "category", "subcategory"]
+
+value_cols = {
+    "actuals": "actual_value",
+    "baselines": "value",
+    "changes": "value",
+}
+
+# Whether each input DataFrame is only rolled up where every leaf has data.
+# Actuals and baselines without a leaf's row are incomplete, but changes
+# without a leaf's row are no change to that leaf (0).
+complete_leaves = {
+    "actuals": True,
+    "baselines": True,
+    "changes": False,
+}
+
+
+def read_hierarchy(file=HIERARCHY_FILE):
+    """
+    Read the budget hierarchy definition file.
+
+    Parameters
+    ----------
+    file : str, optional
+        Name of the file containing the budget hierarchy
+        (default is HIERARCHY_FILE, defined in merge.py)
+
+    Returns
+    -------
+    hierarchy : pandas.DataFrame
+        DataFrame with one row for each node of the hierarchy, with the
+        columns `component`, `category`, `subcategory`, and `parent` (the
+        subcategory of the parent node, missing for top nodes). Memo items
+        are not nodes of the hierarchy.
+    """
+    with open(file) as hierarchy_file:
+        nodes = yaml.load(hierarchy_file, Loader=yaml.FullLoader)
+
+    hierarchy = pd.DataFrame(
+        [
+            {
+                "component": component,
+                "category": node["category"],
+                "subcategory": subcategory,
+                "parent": node.get("parent"),
+            }
+            for component, component_nodes in nodes.items()
+            for subcategory, node in component_nodes.items()
+            if not node.get("memo", False)
+        ]
+    )
+
+    return hierarchy
+
+
+def make_ancestors(hierarchy):
+    """
+    Map each leaf of the hierarchy to every one of its ancestors.
+
+    Parameters
+    ----------
+    hierarchy : pandas.DataFrame
+        Budget hierarchy, created by `read_hierarchy()`
+
+    Returns
+    -------
+    ancestors : pandas.DataFrame
+        DataFrame with one row for each leaf and ancestor (including the
+        leaf itself), with the columns `component`, `leaf_category`,
+        `leaf_subcategory`, `category`, `subcategory`, and `num_leaves`
+        (the number of leaves under the ancestor)
+
+    Notes
+    -----
+    The mapping is built with one join for each level of the hierarchy, so
+    the hierarchy can have any depth.
+    """
+    parents = hierarchy.loc[hierarchy["parent"].notna(), ["component", "subcategory", "parent"]]
+    is_parent = hierarchy.set_index(["component", "subcategory"]).index.isin(
+        parents.set_index(["component", "parent"]).index
+    )
+    leaves = hierarchy.loc[~is_parent, ["component", "subcategory"]]
+
+    level = leaves.assign(leaf_subcategory=leaves["subcategory"])
+    levels = [level]
+    while len(level) > 0:
+        # Move up one level of the hierarchy
+        level = (
+            pd.merge(level, parents, how="inner", on=["component", "subcategory"])
+            .drop(columns=["subcategory"])
+            .rename(columns={"parent": "subcategory"})
+        )
+        levels.append(level)
+
+    ancestors = pd.concat(levels, ignore_index=True)
+
+    # Add the categories of the leaves and ancestors
+    categories = hierarchy[["component", "subcategory", "category"]]
+    ancestors = pd.merge(ancestors, categories, how="left", on=["component", "subcategory"])
+    ancestors = pd.merge(
+        ancestors,
+        categories.rename(
+            columns={"subcategory": "leaf_subcategory", "category": "leaf_category"}
+        ),
+        how="left",
+        on=["component", "leaf_subcategory"],
+    )
+
+    ancestors["num_leaves"] = ancestors.groupby(node_cols)["leaf_subcategory"].transform("size")
+
+    return ancestors[
+        ["component", "leaf_category", "leaf_subcategory", "category", "subcategory", "num_leaves"]
+    ]
+
+
+def roll_up(df, ancestors, by, value_col, complete=True):
+    """
+    Roll up leaf-level data to every ancestor in the hierarchy.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Input data (actuals, baselines, or changes); only the rows of
+        leaves of the hierarchy are used
+
+    ancestors : pandas.DataFrame
+        Map of leaves to ancestors, created by `make_ancestors()`
+
+    by : list of str
+        Columns (other than the component, category, and subcategory)
+        identifying the rows of `df`, such as `fiscal_year`
+
+    value_col : str
+        Name of the column to roll up
+
+    complete : bool, optional
+        Whether nodes are only rolled up where every leaf under them has
+        data; otherwise, missing leaves count as 0 (default is True)
+
+    Returns
+    -------
+    rolled_up : pandas.DataFrame
+        DataFrame with the columns of `df` that are in `node_cols`, `by`,
+        and `value_col`, with one row for each node (leaves included) and
+        value of `by` for which every leaf under the node has data (any
+        leaf, if `complete` is False)
+
+    Notes
+    -----
+    Every ancestor is calculated in a single grouped sum over the leaf
+    rows joined to their ancestors, whatever the depth of the hierarchy.
+    If `complete` is True, nodes missing data for some of their leaves are
+    dropped, rather than rolled up from incomplete data.
+    """
+    leaf_data = pd.merge(
+        df,
+        ancestors,
+        how="inner",
+        left_on=node_cols,
+        right_on=["component", "leaf_category", "leaf_subcategory"],
+        suffixes=("_leaf", ""),
+    )
+
+    group_cols = node_cols + by
+    rolled_up = (
+        leaf_data.groupby(group_cols + ["num_leaves"], dropna=False)[value_col]
+        .agg(["sum", "count"])
+        .reset_index()
+    )
+
+    if complete:
+        rolled_up = rolled_up.loc[rolled_up["count"] == rolled_up["num_leaves"], :]
+    rolled_up = rolled_up.loc[:, group_cols + ["sum"]]
+    rolled_up = rolled_up.rename(columns={"sum": value_col}).reset_index(drop=True)
+
+    return rolled_up
+
+
+def check_totals(
+    dfs,
+    hierarchy,
+    tolerance=0.01,
+    key_cols=key_cols,
+    value_cols=value_cols,
+    complete_leaves=complete_leaves,
+):
+    """
+    Check that the totals supplied in the input data match the roll-ups
+    of their leaves.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    hierarchy : pandas.DataFrame
+        Budget hierarchy, created by `read_hierarchy()`
+
+    tolerance : float, optional
+        Largest absolute difference (in billions of dollars) between a
+        supplied total and its roll-up that is not reported
+        (default is 0.01)
+
+    key_cols : dict, optional
+        A dictionary containing the columns that uniquely identify the
+        rows of each input DataFrame
+        (default is key_cols, defined in validate.py)
+
+    value_cols : dict, optional
+        A dictionary containing the value column of each input DataFrame
+        (default is value_cols, defined above)
+
+    complete_leaves : dict, optional
+        A dictionary containing whether each input DataFrame is only rolled
+        up where every leaf has data (see `roll_up()`)
+        (default is complete_leaves, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each supplied total that differs from
+        its roll-up by more than `tolerance`, with the columns `input`,
+        the key columns, `supplied`, `rolled_up`, and `difference`
+    """
+    ancestors = make_ancestors(hierarchy)
+    is_total = ancestors["subcategory"] != ancestors["leaf_subcategory"]
+    totals = ancestors.loc[is_total, node_cols].drop_duplicates()
+
+    mismatches = []
+    for name, df in zip(["actuals", "baselines", "changes"], dfs[:3]):
+        by = [col for col in key_cols[name] if col not in node_cols]
+        value_col = value_cols[name]
+
+        rolled_up = roll_up(df, ancestors, by, value_col, complete_leaves[name])
+        supplied = pd.merge(df, totals, how="inner", on=node_cols)
+
+        compared = pd.merge(
+            supplied[node_cols + by + [value_col]],
+            rolled_up,
+            how="inner",
+            on=node_cols + by,
+            suffixes=("_supplied", "_rolled_up"),
+        )
+        compared = compared.rename(
+            columns={
+                f"{value_col}_supplied": "supplied",
+                f"{value_col}_rolled_up": "rolled_up",
+            }
+        )
+        compared["difference"] = compared["supplied"] - compared["rolled_up"]
+
+        mismatch = np.abs(compared["difference"]) > tolerance
+        mismatches.append(compared.loc[mismatch, :].assign(input=name))
+
+    mismatches = pd.concat(mismatches, ignore_index=True)
+    first_cols = ["input"] + node_cols
+    other_cols = [col for col in mismatches.columns if col not in first_cols]
+
+    return mismatches[first_cols + other_cols]
+
+
+def apply_roll_ups(
+    dfs,
+    hierarchy,
+    key_cols=key_cols,
+    value_cols=value_cols,
+    complete_leaves=complete_leaves,
+):
+    """
+    Replace the totals in the input data with the roll-ups of their
+    leaves.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    hierarchy : pandas.DataFrame
+        Budget hierarchy, created by `read_hierarchy()`
+
+    key_cols : dict, optional
+        A dictionary containing the columns that uniquely identify the
+        rows of each input DataFrame
+        (default is key_cols, defined in validate.py)
+
+    value_cols : dict, optional
+        A dictionary containing the value column of each input DataFrame
+        (default is value_cols, defined above)
+
+    complete_leaves : dict, optional
+        A dictionary containing whether each input DataFrame is only rolled
+        up where every leaf has data (see `roll_up()`)
+        (default is complete_leaves, defined above)
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The input DataFrames, in the same order, with the rows of every
+        node that can be rolled up replaced by their roll-ups. Other rows
+        (memo items, and totals for years without complete leaf data, or
+        without any leaf changes) are kept as supplied.
+
+    Notes
+    -----
+    With this function, only the leaf data (and totals for years before
+    leaf data are available) need to be maintained.
+    """
+    ancestors = make_ancestors(hierarchy)
+
+    rolled_up_dfs = []
+    for name, df in zip(["actuals", "baselines", "changes"], dfs[:3]):
+        keys = key_cols[name]
+        by = [col for col in keys if col not in node_cols]
+        value_col = value_cols[name]
+
+        rolled_up = roll_up(df, ancestors, by, value_col, complete_leaves[name])
+
+        # Add the other columns (such as the baseline flags), which are the
+        # same for every node of a component
+        other_cols = [col for col in df.columns if col not in keys + [value_col]]
+        if len(other_cols) > 0:
+            rolled_up = pd.merge(
+                rolled_up,
+                df[["component"] + by + other_cols].drop_duplicates(subset=["component"] + by),
+                how="left",
+                on=["component"] + by,
+            )
+
+        is_rolled_up = df.set_index(keys).index.isin(rolled_up.set_index(keys).index)
+        combined = pd.concat(
+            [df.loc[~is_rolled_up, :], rolled_up[df.columns]],
+            ignore_index=True,
+        )
+        rolled_up_dfs.append(combined)
+
+    return tuple(rolled_up_dfs) + (dfs[3],)
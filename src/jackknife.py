@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+from errors import error_measures
+from merge import add_optional_keys
+from summary import seasons, group_cols, stack_seasons
+
+stats_cols = [
+    "average_error",
+    "average_absolute_error",
+    "RMSE",
+    "two_thirds_spread",
+]
+
+
+def calc_jackknife_stats(
+    errors,
+    component,
+    seasons=seasons,
+    group_cols=group_cols,
+    stats_cols=stats_cols,
+):
+    """
+    Calculate the summary statistics of projection errors with each
+    baseline vintage left out, for a given budgetary component.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined in summary.py)
+
+    group_cols : list of str, optional
+        A list of columns to group by when calculating summary statistics
+        (default is group_cols, defined in summary.py)
+
+    stats_cols : list of str, optional
+        The summary statistics reported, named as in
+        `summary.calc_summary_stats()`
+        (default is stats_cols, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        Long-format DataFrame with one row for each group, baseline left
+        out, and statistic, with the columns:
+            - group_cols
+            - baseline_date: the baseline left out
+            - projected_fiscal_year: the fiscal year of the error left out
+            - statistic: name of the summary statistic
+            - full_value: the statistic of all the group's errors
+            - value: the statistic without the baseline
+            - difference: value minus full_value
+
+        Statistics of groups with a single error are missing when it is
+        left out.
+
+    Notes
+    -----
+    The average error, average absolute error, and RMSE without each
+    error are derived from the sums of the group's errors, absolute
+    errors, and squared errors, so all of them are calculated in O(n)
+    rather than recalculating the statistics n times.
+
+    For the two-thirds spread, the errors are sorted once by group and by
+    value. Without the error at rank r, the errors at ranks above r move
+    down one place, so the quantiles without it are read from the same
+    sorted array in O(1), with the same linear interpolation as
+    `summary.calc_summary_stats()`.
+    """
+    group_cols = add_optional_keys(group_cols, errors)
+    error_col = error_measures[component]
+
+    stacked_errors = stack_seasons(errors, component, seasons)
+    stacked_errors = stacked_errors.loc[
+        stacked_errors[error_col].notna(),
+        group_cols + ["baseline_date", "projected_fiscal_year", error_col],
+    ]
+
+    # A single sort puts each group's errors together, in increasing order
+    sorted_errors = stacked_errors.sort_values(group_cols + [error_col]).reset_index(drop=True)
+    codes = sorted_errors.groupby(group_cols, observed=True, sort=False).ngroup().to_numpy()
+    new_group = np.diff(codes, prepend=-1) != 0
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, len(sorted_errors)))
+
+    values = sorted_errors[error_col].to_numpy(dtype="float")
+    group_idx = np.repeat(np.arange(len(starts)), counts)
+    ranks = np.arange(len(values)) - starts[group_idx]
+
+    # Sufficient statistics of each group
+    sums = np.bincount(group_idx, weights=values)
+    abs_sums = np.bincount(group_idx, weights=np.abs(values))
+    squared_sums = np.bincount(group_idx, weights=values**2)
+
+    full = {
+        "average_error": sums / counts,
+        "average_absolute_error": abs_sums / counts,
+        "RMSE": np.sqrt(squared_sums / counts),
+        "two_thirds_spread": (
+            calc_quantiles(values, starts, counts, 5 / 6)
+            - calc_quantiles(values, starts, counts, 1 / 6)
+        ),
+    }
+
+    # Statistics without each error
+    n = counts[group_idx] - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        left_out = {
+            "average_error": np.where(n > 0, (sums[group_idx] - values) / n, np.nan),
+            "average_absolute_error": np.where(
+                n > 0, (abs_sums[group_idx] - np.abs(values)) / n, np.nan
+            ),
+            "RMSE": np.where(
+                n > 0,
+                np.sqrt(np.maximum(squared_sums[group_idx] - values**2, 0) / n),
+                np.nan,
+            ),
+            "two_thirds_spread": (
+                calc_quantiles(values, starts[group_idx], n, 5 / 6, ranks)
+                - calc_quantiles(values, starts[group_idx], n, 1 / 6, ranks)
+            ),
+        }
+
+    stats_dfs = []
+    for stat in stats_cols:
+        stats_df = sorted_errors[group_cols + ["baseline_date", "projected_fiscal_year"]].copy()
+        stats_df["statistic"] = stat
+        stats_df["full_value"] = full[stat][group_idx]
+        stats_df["value"] = left_out[stat]
+        stats_df["difference"] = stats_df["value"] - stats_df["full_value"]
+        stats_dfs.append(stats_df)
+
+    jackknife_stats = pd.concat(stats_dfs, ignore_index=True)
+    jackknife_stats = jackknife_stats.sort_values(
+        group_cols + ["baseline_date"], kind="stable"
+    ).reset_index(drop=True)
+
+    return jackknife_stats
+
+
+def calc_quantiles(values, starts, counts, quantile, left_out_ranks=None):
+    """
+    Calculate a quantile of sorted groups of values, optionally leaving
+    out one value of each group.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values sorted by group and by value
+
+    starts : numpy.ndarray
+        Position in `values` of the first value of each group
+
+    counts : numpy.ndarray
+        Number of values in each group (after leaving one out, if
+        `left_out_ranks` is given)
+
+    quantile : float
+        The quantile to calculate, between 0 and 1
+
+    left_out_ranks : numpy.ndarray, optional
+        Rank within its group of the value left out of each group; by
+        default, no value is left out
+
+    Returns
+    -------
+    numpy.ndarray
+        The quantile of each group, missing for empty groups. Values are
+        interpolated linearly between the closest ranks, as in
+        `pandas.Series.quantile()`.
+    """
+    positions = np.maximum(counts - 1, 0) * quantile
+    lower = np.floor(positions).astype("int")
+    upper = np.ceil(positions).astype("int")
+    weights = positions - lower
+
+    if left_out_ranks is not None:
+        # Ranks at or above the value left out move up one place
+        lower = lower + (lower >= left_out_ranks)
+        upper = upper + (upper >= left_out_ranks)
+
+    # Empty groups read any value, which is replaced below
+    lower_values = values[np.minimum(starts + lower, len(values) - 1)]
+    upper_values = values[np.minimum(starts + upper, len(values) - 1)]
+    diffs = upper_values - lower_values
+
+    # Same linear interpolation as numpy, which pandas uses for quantiles
+    quantile_values = np.where(
+        weights < 0.5,
+        lower_values + diffs * weights,
+        upper_values - diffs * (1 - weights),
+    )
+
+    return np.where(counts > 0, quantile_values, np.nan)
@@ -1,58 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
 import os.path
 import sys
-import pandas as pd
-from merge import merge_data
-from errors import calc_errors
-from summary import calc_summary_stats
+from data_io import read_inputs, submit_outputs
+from validate import validate_inputs
 from scale import scale_actuals
+from api import evaluate_component
 from write_Excel import write_Excel
+from metrics import start_run, record, timed, finish_run
 
 CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
 INPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../input_data")
 OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
 
-actuals = pd.read_csv(f"{INPUT_PATH}/actuals.csv")
-baselines = pd.read_csv(f"{INPUT_PATH}/baselines.csv")
-changes = pd.read_csv(f"{INPUT_PATH}/baseline_changes.csv")
-GDP = pd.read_csv(f"{INPUT_PATH}/actual_GDP.csv")
-print("Input data read")
-
-scaled_actuals = scale_actuals(actuals, GDP)
-dfs = (actuals, baselines, changes, GDP)
-
-if len(sys.argv[1:]) == 0:
-    components = ["outlay", "revenue", "deficit", "debt"]
-else:
-    components = sys.argv[1:]
-
-for component in components:
-    assert_message = "You passed an invalid argument to src/main.py.\nPlease try again."
-    assert component in ["outlay", "revenue", "deficit", "debt"], assert_message
-
-    print(f"Analyzing {component} data")
-    projection_data = merge_data(dfs, component)
-    projection_errors = calc_errors(projection_data, component)
-    summary_stats = calc_summary_stats(projection_errors, component)
-    print("    Projection errors and summary stats calculated")
-
-    projection_errors.to_csv(
-        f"{OUTPUT_PATH}/{component}_projection_errors.csv",
-        index=False,
-        float_format="%.3f",
-    )
-    summary_stats.to_csv(
-        f"{OUTPUT_PATH}/{component}_projection_errors_summary_stats.csv",
-        index=False,
-        float_format="%.1f",
-    )
-    scaled_actuals.loc[(scaled_actuals["component"] == component), :].to_csv(
-        f"{OUTPUT_PATH}/{component}_actuals_pct_GDP.csv",
-        index=False,
-        float_format="%.1f",
-    )
-    print("    Output data written")
-
-print("\nProgram finished successfully.")
-print(f"Results files were written to: {OUTPUT_PATH}.\n")
-
-write_Excel()
+
+def main(components, input_path=INPUT_PATH, output_path=OUTPUT_PATH, metrics_path=None):
+    """
+    Evaluate CBO's projections from the input data files, and write the
+    output files and the Excel file.
+
+    The analysis is done by `api.evaluate_component()`; this function only
+    reads and writes the files.
+
+    Parameters
+    ----------
+    components : list of str
+        The components evaluated ("outlay", "revenue", "deficit", "debt")
+
+    input_path : str, optional
+        Path to the directory containing the input data files
+        (default is INPUT_PATH, defined above)
+
+    output_path : str, optional
+        Path to the directory of the output files
+        (default is OUTPUT_PATH, defined above)
+
+    metrics_path : str, optional
+        Path to the directory of the metrics files (see
+        `metrics.finish_run()`); by default, the `metrics` directory next
+        to `output_path`
+
+    Returns
+    -------
+    None; Writes the output files to disk.
+    """
+    if metrics_path is None:
+        metrics_path = os.path.join(os.path.dirname(os.path.abspath(output_path)), "metrics")
+
+    run = start_run()
+
+    # The run is finished (and its metrics written) even if it fails
+    try:
+        with timed(run, "inputs_read") as event:
+            actuals, baselines, changes, GDP = read_inputs(input_path)
+            dfs = (actuals, baselines, changes, GDP)
+            for name, df in zip(["actuals", "baselines", "changes", "GDP"], dfs):
+                event[f"{name}_rows"] = len(df)
+        print("Input data read")
+
+        validate_inputs(dfs)
+        print("Input data validated")
+
+        scaled_actuals = scale_actuals(actuals, GDP)
+
+        # Output files are written by a background thread pool, so each
+        # component's files are written while the next component is being
+        # analyzed.
+        with ThreadPoolExecutor(max_workers=4) as writer_pool:
+            writes = {}
+
+            for component in components:
+                assert_message = "You passed an invalid argument to src/main.py.\nPlease try again."
+                assert component in ["outlay", "revenue", "deficit", "debt"], assert_message
+
+                print(f"Analyzing {component} data")
+                results = evaluate_component(dfs, component, scaled_actuals, run)
+                print("    Projection errors and summary stats calculated")
+
+                writes |= submit_outputs(
+                    writer_pool,
+                    output_path,
+                    component,
+                    results["projection_errors"],
+                    results["seasonal_stats"],
+                    results["scaled_actuals"],
+                )
+                print("    Output data queued for writing")
+
+        # Make sure every output file was written before the Excel file is created
+        for filepath, write in writes.items():
+            record(run, "output_written", file=os.path.basename(filepath), bytes=write.result())
+
+        print("\nProgram finished successfully.")
+        print(f"Results files were written to: {output_path}.\n")
+
+        with timed(run, "excel_written"):
+            write_Excel(output_path=output_path)
+    finally:
+        finish_run(run, metrics_path)
+
+    return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv[1:]) == 0:
+        components = ["outlay", "revenue", "deficit", "debt"]
+    else:
+        components = sys.argv[1:]
+
+    main(components)
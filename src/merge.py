@@ -1,4 +1,7 @@
+import os.path
 import pandas as pd
+import yaml
+from cache import memoize
 
 agg_cols = [
     "component",
@@ -8,15 +11,85 @@ agg_cols = [
     "projected_year_number",
 ]
 
-leg_labels = {
-    "revenue": "legislative_revenue_change",
-    "outlay": "legislative_outlay_change",
-    "deficit": "legislative_deficit_change",
-    "debt": "legislative_deficit_change",
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+HIERARCHY_FILE = os.path.abspath(f"{CURRENT_PATH}/../hierarchy.yml")
+
+
+def read_orderings(file=HIERARCHY_FILE):
+    """
+    Read the orderings of the categories and subcategories of each
+    component from the budget hierarchy file.
+
+    Parameters
+    ----------
+    file : str, optional
+        Name of the file containing the budget hierarchy
+        (default is HIERARCHY_FILE, defined above)
+
+    Returns
+    -------
+    cats : dict
+        A dictionary containing the categories of each component, in order
+        of their first node in the file
+
+    subcats : dict
+        A dictionary containing the subcategories of each component, in
+        the order of their nodes in the file (memo items included)
+    """
+    with open(file) as hierarchy_file:
+        nodes = yaml.load(hierarchy_file, Loader=yaml.FullLoader)
+
+    cats = {
+        component: list(dict.fromkeys(node["category"] for node in component_nodes.values()))
+        for component, component_nodes in nodes.items()
+    }
+    subcats = {component: list(component_nodes) for component, component_nodes in nodes.items()}
+
+    return cats, subcats
+
+
+# Orderings of the categories and subcategories of each component, used to
+# sort the merged data
+cats, subcats = read_orderings()
+
+sort_cols = [
+    "component",
+    "category",
+    "subcategory",
+    "projected_year_number",
+    "baseline_date"
+]
+
+# Optional column of the baselines identifying the forecaster (for example,
+# "CBO" or "Administration"). Every source is merged in the same pass.
+source_col = "source"
+
+# Optional column of the actuals and GDP identifying the vintage (release)
+# of the data. Every vintage is evaluated in the same pass.
+vintage_col = "vintage"
+
+# Optional key columns, in the order they are added after `component`
+optional_keys = [source_col, vintage_col]
+
+change_categories = ["Legislative", "Economic", "Technical"]
+
+change_labels = {
+    "revenue": "revenue_change",
+    "outlay": "outlay_change",
+    "deficit": "deficit_change",
+    "debt": "deficit_change",
 }
 
 
-def merge_data(dfs, component, agg_cols=agg_cols, leg_labels=leg_labels):
+def merge_data(
+    dfs,
+    component,
+    agg_cols=agg_cols,
+    change_labels=change_labels,
+    change_categories=change_categories,
+    sort_cols=sort_cols,
+    cache_path=None,
+):
     """
     Merge and filter data from multiple DataFrames related to
     projection errors.
@@ -46,9 +119,22 @@ def merge_data(dfs, component, agg_cols=agg_cols, leg_labels=leg_labels):
         A list of columns to grou by when aggregating results
         (default is agg_cols, defined above)
 
-    leg_labels : dict, optional
-        A dictionary containing labels for legislative changes
-        (default is leg_labels, defined above)
+    change_labels : dict, optional
+        A dictionary containing the suffixes of the labels for changes
+        (default is change_labels, defined above)
+
+    change_categories : list of str, optional
+        A list of the categories of changes (legislative, economic,
+        technical) to aggregate
+        (default is change_categories, defined above)
+
+    sort_cols : list of str, optional
+        A list of columns to sort the merged data by
+        (default is sort_cols, defined above)
+
+    cache_path : str, optional
+        Path to a directory where the result of each step is cached (see
+        `cache.memoize()`); by default, results are not cached
 
     Returns
     -------
@@ -68,34 +154,194 @@ def merge_data(dfs, component, agg_cols=agg_cols, leg_labels=leg_labels):
     1. Select relevant baseline data for the specified component.
     2. Merge actuals with the selected baselines.
     3. Merge GDP data with the merged actuals and baselines.
-    4. Retrieve legislative changes related to the specified component.
-    5. Merge legislative changes with the merged data.
-    6. Aggregate legislative changes and calculate cumulative effects.
-    7. Merge aggregated legislative changes with the merged data.
+    4. Retrieve changes related to the specified component.
+    5. Merge changes with the merged data.
+    6. Aggregate changes by change category and calculate cumulative
+       effects.
+    7. Merge aggregated changes with the merged data.
     8. Filter the merged data based on specific criteria.
     9. Sort the filtered data to maintain hierarchy and ordering.
 
     The resulting DataFrame contains the merged and sorted data for
     further analysis.
+
+    If the baselines have a `source` column, the projections of every
+    source are merged together, so the merges with the actuals and GDP
+    are done once rather than once for each source, and `source` is added
+    to the keys of the aggregated changes and to the sort columns. Changes
+    without a `source` column apply to the baselines of every source.
+
+    If the actuals or GDP have a `vintage` column, the data are merged
+    once without it, and the merged data are then joined with the actual
+    values and GDP of every vintage (see `broadcast_vintages()`), so only
+    the last joins are repeated for each vintage. `vintage` is added to
+    the sort columns.
+
+    When results are cached, the steps only receive the input rows of the
+    component (see `select_component_inputs()`), so changes to the data
+    of other components do not invalidate the cached results.
     """
     assert component in ["outlay", "revenue", "deficit", "debt"]
 
+    if cache_path is None:
+        step = lambda function: function
+    else:
+        step = lambda function: memoize(function, cache_path)
+        dfs = select_component_inputs(dfs, component)
+
     # Unpack the dfs parameter
     actuals, baselines, changes, GDP = dfs
 
-    relevant_baselines = get_relevant_baselines(baselines, component)
-    bl_act = merge_baselines_actuals(relevant_baselines, actuals)
-    bl_act_GDP = merge_on_GDP(bl_act, GDP)
-    leg_changes = get_leg_changes(changes, component, leg_labels)
-    bl_act_leg = merge_on_leg_changes(bl_act_GDP, leg_changes)
-    bl_act_leg_agg = aggregate_leg_changes(bl_act_leg, component, agg_cols, leg_labels)
-    merged_df = merge_on_agg_leg_changes(bl_act_GDP, bl_act_leg_agg, component, agg_cols)
-    filtered_data = filter_merged_data(merged_df)
-    sorted_data = sort_data(filtered_data, component)
+    agg_cols = add_optional_keys(agg_cols, baselines)
+    sort_cols = add_optional_keys(sort_cols, baselines, actuals, GDP)
+
+    has_vintages = vintage_col in actuals.columns or vintage_col in GDP.columns
+    if has_vintages:
+        vintage_actuals, vintage_GDP = actuals, GDP
+        actuals = actuals.drop(columns=[vintage_col], errors="ignore").drop_duplicates(
+            ["component", "category", "subcategory", "fiscal_year"]
+        )
+        GDP = GDP.drop(columns=[vintage_col], errors="ignore").drop_duplicates(["fiscal_year"])
+
+    relevant_baselines = step(get_relevant_baselines)(baselines, component)
+    bl_act = step(merge_baselines_actuals)(relevant_baselines, actuals)
+    bl_act_GDP = step(merge_on_GDP)(bl_act, GDP)
+    component_changes = step(get_changes)(changes, component)
+    bl_act_chg = step(merge_on_changes)(bl_act_GDP, component_changes)
+    bl_act_chg_agg = step(aggregate_changes)(
+        bl_act_chg, component, agg_cols, change_labels, change_categories
+    )
+    merged_df = step(merge_on_agg_changes)(bl_act_GDP, bl_act_chg_agg, component, agg_cols)
+    filtered_data = step(filter_merged_data)(merged_df)
+    if has_vintages:
+        filtered_data = step(broadcast_vintages)(filtered_data, vintage_actuals, vintage_GDP)
+    sorted_data = step(sort_data)(filtered_data, component, cats, subcats, sort_cols)
 
     return sorted_data
 
 
+def select_component_inputs(dfs, component):
+    """
+    Select the rows of the input data used to merge data for a component.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge_data()`)
+
+    component : str
+        The budgetary component for which data is being merged
+        ("outlay", "revenue", "deficit", "debt")
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The input DataFrames, in the same order, with only the rows of the
+        component. Debt uses the changes in deficits (see `get_changes()`),
+        and GDP is not filtered.
+    """
+    actuals, baselines, changes, GDP = dfs
+    change_component = "deficit" if component == "debt" else component
+
+    return (
+        actuals.loc[actuals["component"] == component, :],
+        baselines.loc[baselines["component"] == component, :],
+        changes.loc[changes["component"] == change_component, :],
+        GDP,
+    )
+
+
+def add_optional_keys(cols, *dfs, optional_keys=optional_keys):
+    """
+    Add the optional key columns (`source`, `vintage`) that the data have
+    to a list of key columns.
+
+    Parameters
+    ----------
+    cols : list of str
+        Key columns (for example, `agg_cols`)
+
+    *dfs : pandas.DataFrame
+        The data the keys identify
+
+    optional_keys : list of str, optional
+        Names of the optional key columns
+        (default is optional_keys, defined above)
+
+    Returns
+    -------
+    list of str
+        A copy of `cols` with the optional key columns that any of `dfs`
+        has, and `cols` does not include, added after `component` (or
+        first), in the order of `optional_keys`
+    """
+    cols = list(cols)
+    position = cols.index("component") + 1 if "component" in cols else 0
+
+    for key in optional_keys:
+        if key not in cols and any(key in df.columns for df in dfs):
+            cols.insert(position, key)
+            position += 1
+
+    return cols
+
+
+def broadcast_vintages(merged_df, actuals, GDP):
+    """
+    Join merged data with the actual values and GDP of every vintage.
+
+    Parameters
+    ----------
+    merged_df : DataFrame
+        A DataFrame containing merged data (see `merge_data()`), with the
+        actual values and GDP of a single vintage
+
+    actuals : DataFrame
+        A DataFrame containing actual data, optionally with a `vintage`
+        column
+
+    GDP : DataFrame
+        A DataFrame containing GDP data, optionally with a `vintage` column
+
+    Returns
+    -------
+    DataFrame
+        The merged data, with the `actual_value` and `GDP` columns replaced
+        by those of each vintage, and a `vintage` column after `component`
+
+    Notes
+    -----
+    Inputs without a `vintage` column are used for every vintage of the
+    other input. If both have one, the actual values and GDP of the same
+    vintage are matched. Keys without actual values in a vintage are
+    dropped from that vintage, as in `merge_baselines_actuals()`.
+    """
+    output_cols = add_optional_keys(merged_df.columns, actuals, GDP)
+
+    merged_df = pd.merge(
+        merged_df.drop(columns=["actual_value", "GDP"]),
+        actuals,
+        how="inner",
+        left_on=["component", "category", "subcategory", "projected_fiscal_year"],
+        right_on=["component", "category", "subcategory", "fiscal_year"],
+    ).drop(columns=["fiscal_year"])
+
+    GDP_keys = ["fiscal_year"]
+    if vintage_col in actuals.columns and vintage_col in GDP.columns:
+        GDP_keys.append(vintage_col)
+
+    merged_df = pd.merge(
+        merged_df,
+        GDP,
+        how="left",
+        left_on=["projected_fiscal_year"] + GDP_keys[1:],
+        right_on=GDP_keys,
+    ).drop(columns=["fiscal_year"])
+
+    return merged_df[output_cols]
+
+
 def get_relevant_baselines(baselines, component):
     """
     Get the relevant subset of baseline projection data for merging.
@@ -239,46 +485,40 @@ def merge_on_GDP(bl_act, GDP):
 
     return bl_act_GDP
 
-
-def get_leg_changes(changes, component, leg_labels):
+def get_changes(changes, component):
     """
-    Get legislative changes from a DataFrame of changes based on the
-    given budgetary component.
+    Get changes from a DataFrame of changes based on the given budgetary
+    component.
 
     Parameters
     ----------
     changes : DataFrame
-        A DataFrame containing various types of changes, including
-        legislative changes
+        A DataFrame containing legislative, economic, and technical changes
 
     component : str
-        A string specifying the component for which legislative changes
-        should be extracted
-
-    leg_labels : dict
-        A dictionary containing labels for legislative changes
+        A string specifying the component for which changes should be
+        extracted
 
     Returns
     -------
     DataFrame
-        A DataFrame containing only legislative changes for the given
-        component
+        A DataFrame containing the changes for the given component
 
     Notes
     -----
     This function takes a DataFrame `changes` that includes different types
     of changes, such as legislative, economic, or technical changes. It
-    extracts and returns a DataFrame containing only legislative changes
-    based on the given `component` parameter.
+    extracts and returns a DataFrame containing the changes of every
+    category based on the given `component` parameter.
 
-    If `component` is "debt", the function filters legislative changes with
+    If `component` is "debt", the function filters changes with
     `component` set to "deficit".
 
-    If `component` is any other string, it filters legislative changes for
-    that specific `component` and returns them as is.
+    If `component` is any other string, it filters changes for that
+    specific `component` and returns them as is.
 
-    Finally, the `value` column is renamed to the appropriate label defined
-    in `leg_labels`.
+    Finally, the `value` column is renamed to `change_value`, so it can be
+    distinguished from the baseline `value` column after merging.
     """
     changes = changes.copy()
 
@@ -288,59 +528,55 @@ def get_leg_changes(changes, component, leg_labels):
     else:
         filtered_changes = changes.loc[changes["component"] == component, :]
 
-    # Only want to take account for legislative changes
-    # (not economic or technical changes) in calculation of projection errors.
-    leg_changes = filtered_changes.loc[
-        filtered_changes["change_category"] == "Legislative", :
-    ]
-
     # Rename to better column name
-    leg_changes = leg_changes.rename(columns={"value": leg_labels[component]})
+    filtered_changes = filtered_changes.rename(columns={"value": "change_value"})
 
-    return leg_changes
+    return filtered_changes
 
 
-def merge_on_leg_changes(baselines_actuals, leg_changes):
+def merge_on_changes(baselines_actuals, changes):
     """
-    Merge baselines and actuals data with legislative changes based on
-    specific criteria.
+    Merge baselines and actuals data with changes based on specific
+    criteria.
 
     Parameters
     ----------
     baselines_actuals : DataFrame
         A DataFrame containing relevant baseline and actual data
 
-    leg_changes : DataFrame
-        A DataFrame containing legislative changes data
+    changes : DataFrame
+        A DataFrame containing legislative, economic, and technical changes
+        data
 
     Returns
     -------
     DataFrame
         A DataFrame resulting from the merge operation, containing relevant
-        baseline and actual data matched with legislative changes data
+        baseline and actual data matched with changes data
 
     Notes
     -----
     This function merges the `baselines_actuals` DataFrame (containing
-    relevant baseline and actual data) with the `leg_changes` DataFrame
-    (containing legislative changes) using a right join operation.
+    relevant baseline and actual data) with the `changes` DataFrame
+    using a right join operation.
 
     The merge is performed based on the following columns:
         - `component`
         - `category`
         - `subcategory`
         - `projected_fiscal_year`
+        - `source`, if the changes have a source column
 
     After the merge, date columns `changes_baseline_date` and
     `baseline_date` are converted to datetime data types for comparison
-    in the filtering operation. The function keeps only legislative changes
-    that occurred AFTER the baseline date.
+    in the filtering operation. The function keeps only changes that
+    occurred AFTER the baseline date.
     """
     merged = pd.merge(
         baselines_actuals,
-        leg_changes,
+        changes,
         how="right",
-        on=["component", "category", "subcategory", "projected_fiscal_year"],
+        on=add_optional_keys(["component", "category", "subcategory", "projected_fiscal_year"], changes),
     )
 
     # Change date columns to datetime data types, so they can be compared
@@ -348,49 +584,61 @@ def merge_on_leg_changes(baselines_actuals, leg_changes):
     for col in ["changes_baseline_date", "baseline_date"]:
         merged[col] = pd.to_datetime(merged[col], format="%Y-%m-%d")
 
-    # Only keep legislative changes that are AFTER the baseline date
+    # Only keep changes that are AFTER the baseline date
     cond = merged["changes_baseline_date"] > merged["baseline_date"]
     merged = merged.loc[cond, :]
 
     return merged
 
 
-def aggregate_leg_changes(bl_act_leg, component, agg_cols, leg_labels):
+def aggregate_changes(bl_act_chg, component, agg_cols, change_labels, change_categories):
     """
-    Aggregate legislative changes for a specific component from a DataFrame.
+    Aggregate changes for a specific component from a DataFrame, with one
+    column for each category of changes.
 
     Parameters
     ----------
-    bl_act_leg : DataFrame
-        A DataFrame containing relevant baseline, actual, and legislative
-        changes data
+    bl_act_chg : DataFrame
+        A DataFrame containing relevant baseline, actual, and changes data
 
     component : str
-        A string specifying the component for which legislative changes
-        should be aggregated
+        A string specifying the component for which changes should be
+        aggregated
 
     agg_cols : list of str
         A list of columns to grou by when aggregating results
 
-    leg_labels : dict
-        A dictionary containing labels for legislative changes
+    change_labels : dict
+        A dictionary containing the suffixes of the labels for changes
+
+    change_categories : list of str
+        A list of the categories of changes to aggregate
 
     Returns
     -------
     DataFrame
-        A DataFrame containing aggregated legislative changes for the
-        given component
+        A DataFrame containing aggregated changes for the given component,
+        with a `[category]_[component]_change` column for each category
+        of changes (for example, `legislative_outlay_change`), and a
+        `has_legislative_change` column identifying the keys with
+        legislative changes
 
     Notes
     -----
-    This function aggregates legislative changes from the `bl_act_leg`
-    DataFrame, which includes relevant baseline, actual, and legislative
-    changes data. The aggregation is performed based on the given
-    `component`.
+    This function aggregates changes from the `bl_act_chg` DataFrame,
+    which includes relevant baseline, actual, and changes data. The
+    changes are summed and pivoted on `change_category` in a single
+    groupby(), so every category of changes is aggregated at once. Keys
+    with no changes in a category have a change of 0 in that category.
+
+    Every key with changes is kept, so the cumulative debt changes include
+    every projection year with changes. Keys without legislative changes
+    are only dropped by `merge_on_agg_changes()`.
 
     If `component` is "debt", the function calculates the cumulative
-    legislative deficit changes over the entire projection period and
-    creates a column `legislative_debt_change` representing the debt change effects.
+    deficit changes over the entire projection period and creates a
+    `[category]_debt_change` column representing the debt change effects
+    for each category of changes.
 
     For CBO's revenue, outlay, and deficit projections, the effects of
     legislation and the value of those effects are applied to individual
@@ -414,48 +662,89 @@ def aggregate_leg_changes(bl_act_leg, component, agg_cols, leg_labels):
         # Include the flags in the aggregation columns for revenue
         agg_cols += ["Spring_flag", "Winter_flag"]
 
-    bl_act_leg_agg = (
-        bl_act_leg.groupby(agg_cols)[leg_labels[component]].sum().reset_index()
+    labels = {
+        category: f"{category.lower()}_{change_labels[component]}"
+        for category in change_categories
+    }
+
+    # Keys with changes, and whether they have legislative changes
+    has_leg_changes = (
+        bl_act_chg["change_category"].eq("Legislative")
+        .groupby([bl_act_chg[col] for col in agg_cols])
+        .any()
+        .rename("has_legislative_change")
     )
 
-    if component == "debt":
-        bl_act_leg_agg["baseline_year"] = (
-            bl_act_leg_agg["projected_fiscal_year"]
-            - bl_act_leg_agg["projected_year_number"]
-            + 1
-        ).astype("int")
+    bl_act_chg_agg = (
+        bl_act_chg.loc[bl_act_chg["change_category"].isin(change_categories), :]
+        .pivot_table(
+            index=agg_cols,
+            columns="change_category",
+            values="change_value",
+            aggfunc="sum",
+        )
+        .reindex(index=has_leg_changes.index, columns=change_categories)
+        .rename(columns=labels)
+        .rename_axis(columns=None)
+        .join(has_leg_changes)
+        .reset_index()
+    )
+
+    chg_cols = list(labels.values())
 
-        bl_act_leg_agg[leg_labels[component]] *= -1
+    if component == "debt":
+        bl_act_chg_agg[chg_cols] *= -1
 
-        def calc_cum_deficit_effects(row):
-            cond_1 = bl_act_leg_agg["baseline_year"] == row["baseline_year"]
-            cond_2 = (
-                bl_act_leg_agg["projected_year_number"] <= row["projected_year_number"]
-            )
+    # Keys without changes in a category have no change in that category
+    bl_act_chg_agg[chg_cols] = bl_act_chg_agg[chg_cols].fillna(0)
 
-            return bl_act_leg_agg.loc[cond_1 & cond_2, leg_labels[component]].sum()
+    if component == "debt":
+        bl_act_chg_agg["baseline_year"] = (
+            bl_act_chg_agg["projected_fiscal_year"]
+            - bl_act_chg_agg["projected_year_number"]
+            + 1
+        ).astype("int")
 
-        bl_act_leg_agg["legislative_debt_change"] = bl_act_leg_agg.apply(
-            calc_cum_deficit_effects, axis=1
+        # Cumulative deficit effects through each projection year of a
+        # baseline, for each category and subcategory
+        baseline_cols = add_optional_keys(
+            ["component", "category", "subcategory", "baseline_year"], bl_act_chg_agg
+        )
+        yearly_effects = bl_act_chg_agg.groupby(
+            baseline_cols + ["projected_year_number"]
+        )[chg_cols].sum()
+        cum_effects = yearly_effects.groupby(level=baseline_cols).cumsum()
+        cum_effects.columns = [
+            f"{category.lower()}_debt_change" for category in change_categories
+        ]
+
+        bl_act_chg_agg = pd.merge(
+            bl_act_chg_agg,
+            cum_effects.reset_index(),
+            how="left",
+            on=baseline_cols + ["projected_year_number"],
         )
 
-        bl_act_leg_agg.drop(columns=["baseline_year"], inplace=True)
+        # Order each category's debt change after its deficit change
+        ordered_cols = agg_cols + ["has_legislative_change"]
+        for category in change_categories:
+            ordered_cols += [labels[category], f"{category.lower()}_debt_change"]
+        bl_act_chg_agg = bl_act_chg_agg[ordered_cols]
 
-    return bl_act_leg_agg
+    return bl_act_chg_agg
 
 
-def merge_on_agg_leg_changes(bl_act, agg_leg_changes, component, agg_cols):
+def merge_on_agg_changes(bl_act, agg_changes, component, agg_cols):
     """
-    Merge relevant baseline and actual data with aggregated legislative
-    changes data.
+    Merge relevant baseline and actual data with aggregated changes data.
 
     Parameters
     ----------
     bl_act : DataFrame
         A DataFrame containing relevant baseline and actual data
 
-    agg_leg_changes : DataFrame
-        A DataFrame containing aggregated legislative changes data
+    agg_changes : DataFrame
+        A DataFrame containing aggregated changes data
 
     component : str
         A string specifying the component for which data should be merged
@@ -467,14 +756,18 @@ def merge_on_agg_leg_changes(bl_act, agg_leg_changes, component, agg_cols):
     -------
     DataFrame
         A DataFrame resulting from the merge operation, containing relevant
-        baseline, actual data, and aggregated legislative changes data
+        baseline, actual data, and aggregated changes data
 
     Notes
     -----
     This function merges the `bl_act` DataFrame (containing relevant
-    baseline and actual data) with the `agg_leg_changes` DataFrame
-    (containing aggregated legislative changes data) using an inner join
+    baseline and actual data) with the `agg_changes` DataFrame
+    (containing aggregated changes data) using an inner join
     operation. The merge is performed based on the given `agg_cols`.
+
+    Only keys with legislative changes are kept, because the projection
+    errors are calculated from projections adjusted for legislative
+    changes.
     """
     agg_cols = agg_cols.copy()
 
@@ -482,7 +775,14 @@ def merge_on_agg_leg_changes(bl_act, agg_leg_changes, component, agg_cols):
     if component == "revenue":
         agg_cols += ["Spring_flag", "Winter_flag"]
 
-    merged_df = pd.merge(bl_act, agg_leg_changes, how="inner", on=agg_cols)
+    merged_df = pd.merge(
+        bl_act,
+        agg_changes.loc[agg_changes["has_legislative_change"], :].drop(
+            columns=["has_legislative_change"]
+        ),
+        how="inner",
+        on=agg_cols,
+    )
 
     return merged_df
 
@@ -518,7 +818,7 @@ def filter_merged_data(merged_df):
     return filtered_df
 
 
-def sort_data(merged_data, component):
+def sort_data(merged_data, component, cats=cats, subcats=subcats, sort_cols=sort_cols):
     """
     Sort merged data based on specified sorting criteria.
 
@@ -531,89 +831,61 @@ def sort_data(merged_data, component):
     component : str
         A string specifying the component for which data should be sorted
 
+    cats : dict, optional
+        A dictionary containing the ordering of the categories of each
+        component (default is cats, defined above)
+
+    subcats : dict, optional
+        A dictionary containing the ordering of the subcategories of each
+        component (default is subcats, defined above)
+
+    sort_cols : list of str, optional
+        A list of columns to sort by (default is sort_cols, defined above)
+
     Returns
     -------
     DataFrame
         A DataFrame resulting from sorting the input data based on
         specified criteria
 
+    Raises
+    ------
+    AssertionError
+        If a category or subcategory is lost in sorting
+
     Notes
     -----
     This function sorts the input DataFrame `merged_data` based on specific
     sorting criteria determined by the `component` parameter.
 
     Sorting Criteria:
-    Rows are first sorted by the following columns in ascending order:
+    Rows are first sorted by the following columns (by default) in
+    ascending order:
         - `component`
         - `category`
         - `subcategory`
-        - `baseline_date`
         - `projected_year_number`
+        - `baseline_date`
 
     Additionally, the `category` and `subcategory` columns are sorted based
-    on predefined orderings specific to the `component` parameter.
+    on predefined orderings specific to the `component` parameter (read
+    from the budget hierarchy file). Values that are not in the orderings
+    (for example, account-level subcategories) are kept, and sorted after
+    the values in the orderings, in alphabetical order.
     """
     merged_data = merged_data.copy()
 
-    sort_cols = [
-        "component",
-        "category",
-        "subcategory",
-        "projected_year_number",
-        "baseline_date"
-    ]
+    for col, orderings in [("category", cats), ("subcategory", subcats)]:
+        ordering = list(orderings.get(component, []))
+        values = merged_data[col]
+        unknown_values = sorted(set(values.dropna()) - set(ordering), key=str)
 
-    cats = {
-        "revenue": [
-            "Total",
-            "Individual Income Taxes",
-            "Payroll Taxes",
-            "Corporate Income Taxes",
-            "Customs Duties",
-            "Excise Taxes",
-            "Estate and Gift Taxes",
-            "Miscellaneous Receipts",
-        ],
-        "outlay": ["Total", "Mandatory", "Discretionary", "Net Interest"],
-        "deficit": ["Total"],
-        "debt": ["Total"],
-    }
-
-    subcats = {
-        "revenue": [
-            "Total",
-            "Individual Income Taxes",
-            "Payroll Taxes",
-            "Corporate Income Taxes",
-            "Customs Duties",
-            "Excise Taxes",
-            "Estate and Gift Taxes",
-            "Miscellaneous Receipts",
-        ],
-        "outlay": [
-            "Total",
-            "Total Mandatory",
-            "Social Security",
-            "Medicare",
-            "Medicaid",
-            "Fannie Freddie",
-            "Other Mandatory",
-            "Total Discretionary",
-            "Defense Discretionary",
-            "Nondefense Discretionary",
-            "Net Interest",
-        ],
-        "deficit": ["Total"],
-        "debt": ["Total"],
-    }
-
-    merged_data["category"] = pd.Categorical(
-        merged_data["category"], categories=cats[component], ordered=True
-    )
+        merged_data[col] = pd.Categorical(
+            values, categories=ordering + unknown_values, ordered=True
+        )
 
-    merged_data["subcategory"] = pd.Categorical(
-        merged_data["subcategory"], categories=subcats[component], ordered=True
-    )
+        assert_message = f"Some values of {col} were lost in sorting the {component} data."
+        assert merged_data[col].isna().sum() == values.isna().sum(), assert_message
 
     merged_data.sort_values(by=sort_cols, inplace=True)
 
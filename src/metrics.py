@@ -0,0 +1,210 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import os
+import time
+import uuid
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+METRICS_PATH = os.path.abspath(f"{CURRENT_PATH}/../metrics")
+
+metric_prefix = "evaluation"
+
+
+def start_run():
+    """
+    Start recording the events and metrics of a run.
+
+    Returns
+    -------
+    run : dict
+        A dictionary with the `run_id`, the `start_time` (seconds since
+        the epoch), and the list of recorded `events`
+    """
+    run = {
+        "run_id": uuid.uuid4().hex,
+        "start_time": time.time(),
+        "events": [],
+    }
+    record(run, "run_started")
+
+    return run
+
+
+def record(run, event, **fields):
+    """
+    Record an event of a run.
+
+    Parameters
+    ----------
+    run : dict
+        The run, created by `start_run()`
+
+    event : str
+        Name of the event (for example, "component_analyzed")
+
+    **fields
+        Values describing the event. Numbers become Prometheus metrics
+        and strings become their labels (see `format_prometheus()`).
+
+    Returns
+    -------
+    None
+    """
+    run["events"].append(
+        {
+            "run_id": run["run_id"],
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "event": event,
+            **fields,
+        }
+    )
+
+    return None
+
+
+@contextmanager
+def timed(run, event, **fields):
+    """
+    Record an event with the duration of a block of code.
+
+    Parameters
+    ----------
+    run : dict
+        The run, created by `start_run()`
+
+    event : str
+        Name of the event
+
+    **fields
+        Values describing the event (see `record()`)
+
+    Yields
+    ------
+    dict
+        The event's fields, to which the block can add values (such as
+        row counts); `duration_seconds` and `status` ("ok" or "error") are
+        added when the block ends
+
+    Notes
+    -----
+    The event is recorded even if the block raises an exception, with a
+    `status` of "error" and the name of the exception (`error`); the
+    exception is raised again.
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+        fields["status"] = "ok"
+    except BaseException as error:
+        fields["status"] = "error"
+        fields["error"] = type(error).__name__
+        raise
+    finally:
+        fields["duration_seconds"] = time.perf_counter() - start
+        record(run, event, **fields)
+
+
+def finish_run(run, metrics_path=METRICS_PATH):
+    """
+    Finish a run and write its events and metrics.
+
+    Parameters
+    ----------
+    run : dict
+        The run, created by `start_run()`
+
+    metrics_path : str, optional
+        Path to the directory of the metrics files
+        (default is METRICS_PATH, defined above)
+
+    Returns
+    -------
+    None; Appends the run's events to `runs.jsonl` (one JSON object per
+    line) and replaces `evaluation.prom` (Prometheus text format, for a
+    textfile collector) with the metrics of the run.
+    """
+    end_time = time.time()
+    record(
+        run,
+        "run_finished",
+        start_timestamp_seconds=run["start_time"],
+        end_timestamp_seconds=end_time,
+        duration_seconds=end_time - run["start_time"],
+    )
+
+    os.makedirs(metrics_path, exist_ok=True)
+    with open(os.path.join(metrics_path, "runs.jsonl"), "a", encoding="utf-8") as f:
+        for event in run["events"]:
+            f.write(json.dumps(event) + "\n")
+
+    # Replaced atomically, so the collector never reads a partial file
+    prom_filepath = os.path.join(metrics_path, f"{metric_prefix}.prom")
+    with open(f"{prom_filepath}.tmp", "w", encoding="utf-8") as f:
+        f.write(format_prometheus(run))
+    os.replace(f"{prom_filepath}.tmp", prom_filepath)
+
+    return None
+
+
+def format_prometheus(run, metric_prefix=metric_prefix):
+    """
+    Format the metrics of a run in the Prometheus text format.
+
+    Parameters
+    ----------
+    run : dict
+        The run, created by `start_run()`
+
+    metric_prefix : str, optional
+        Prefix of the metric names (default is metric_prefix, defined
+        above)
+
+    Returns
+    -------
+    str
+        One gauge for each numeric field of each event, named
+        `[prefix]_[event]_[field]`, with the event's string fields as
+        labels (for example,
+        `evaluation_component_analyzed_duration_seconds{component="debt"}`)
+    """
+    samples = {}
+    for event in run["events"]:
+        labels = {
+            key: value
+            for key, value in event.items()
+            if isinstance(value, str) and key not in ["run_id", "time", "event"]
+        }
+        label_text = ",".join(
+            f'{key}="{escape_label(value)}"' for key, value in labels.items()
+        )
+        if len(label_text) > 0:
+            label_text = f"{{{label_text}}}"
+        for key, value in event.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = f"{metric_prefix}_{event['event']}_{key}"
+                samples.setdefault(name, []).append(f"{name}{label_text} {value}")
+
+    lines = []
+    for name, name_samples in samples.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines += name_samples
+
+    return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    """
+    Escape a label value for the Prometheus text format.
+
+    Parameters
+    ----------
+    value : str
+        Label value
+
+    Returns
+    -------
+    str
+        The value with backslashes, double quotes, and line feeds escaped
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,370 @@
+import os.path
+import sys
+import numpy as np
+import pandas as pd
+from data_io import read_inputs
+from errors import error_signs
+from merge import filter_merged_data, add_optional_keys
+from summary import seasons
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+INPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../input_data")
+
+key_cols = ["component", "category", "subcategory"]
+
+# Months of the fiscal year (1 is October, 12 is September)
+months = list(range(1, 13))
+
+# Components whose monthly actuals are flows that add up to the fiscal
+# year's actual value (debt is a stock, so it cannot be nowcast this way)
+nowcast_components = ["outlay", "revenue", "deficit"]
+
+
+def calc_seasonal_shares(monthly_history, key_cols=key_cols, months=months):
+    """
+    Calculate the average share of each fiscal year's actual value received
+    by the end of each month.
+
+    Parameters
+    ----------
+    monthly_history : pandas.DataFrame
+        DataFrame containing monthly actual values of past fiscal years,
+        with the columns `key_cols`, `fiscal_year`, `month` (1 is October),
+        and `value`. Only complete fiscal years (with all 12 months) are
+        used.
+
+    key_cols : list of str, optional
+        A list of columns identifying the series
+        (default is key_cols, defined above)
+
+    months : list of int, optional
+        The months of the fiscal year (default is months, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each series (the `key_cols` index) and
+        one column for each month, containing the average cumulative share
+        of the fiscal year's value received by the end of that month. The
+        share of the last month is 1.
+    """
+    monthly_values = monthly_history.pivot_table(
+        index=key_cols + ["fiscal_year"],
+        columns="month",
+        values="value",
+        aggfunc="sum",
+    ).reindex(columns=months)
+    monthly_values = monthly_values.loc[monthly_values.notna().all(axis=1), :]
+
+    cumulative_values = monthly_values.cumsum(axis=1)
+    cumulative_shares = cumulative_values.div(cumulative_values[months[-1]], axis=0)
+
+    seasonal_shares = cumulative_shares.groupby(level=key_cols).mean()
+    seasonal_shares.columns.name = None
+
+    return seasonal_shares
+
+
+def get_budget_year_projections(baselines, changes, fiscal_year, components=nowcast_components):
+    """
+    Get the budget-year projections of a fiscal year, adjusted for the
+    legislative changes made since the baseline.
+
+    Parameters
+    ----------
+    baselines : pandas.DataFrame
+        DataFrame containing baseline projections (`baselines.csv`)
+
+    changes : pandas.DataFrame
+        DataFrame containing changes to baseline projections
+        (`baseline_changes.csv`)
+
+    fiscal_year : int
+        The fiscal year nowcast
+
+    components : list of str, optional
+        The components nowcast
+        (default is nowcast_components, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each component, category, and
+        subcategory (and source, if the baselines have a `source` column),
+        with the key columns, `baseline_date`, and `adjusted_projection`:
+        the projection of the latest baseline of the season published for
+        the component (see `summary.seasons`), plus the legislative changes
+        made after it, as in `errors.calc_errors()`. Rows filtered out of
+        the merged data (see `merge.filter_merged_data()`) are left out.
+    """
+    projection_cols = add_optional_keys(key_cols, baselines)
+    change_cols = add_optional_keys(key_cols, changes)
+    baselines = filter_merged_data(baselines)
+    budget_year_cond = (baselines["projected_fiscal_year"] == fiscal_year) & (
+        baselines["projected_year_number"] == 1
+    )
+
+    projection_dfs = []
+    for component in components:
+        season = seasons[component][0]
+        component_cond = (baselines["component"] == component) & (baselines[f"{season}_flag"] == True)
+        component_baselines = baselines.loc[budget_year_cond & component_cond, :]
+
+        # Latest baseline of each source
+        latest_dates = component_baselines.groupby(
+            add_optional_keys(["component"], baselines)
+        )["baseline_date"].transform("max")
+        latest_baselines = component_baselines.loc[
+            component_baselines["baseline_date"] == latest_dates,
+            projection_cols + ["baseline_date", "value"],
+        ]
+        projection_dfs.append(latest_baselines)
+
+    projections = pd.concat(projection_dfs, ignore_index=True)
+
+    # Changes without a source apply to the projections of every source,
+    # as in `merge.merge_on_changes()`
+    legislative_changes = pd.merge(
+        projections[projection_cols + ["baseline_date"]],
+        changes.loc[
+            (changes["change_category"] == "Legislative")
+            & (changes["projected_fiscal_year"] == fiscal_year),
+            change_cols + ["changes_baseline_date", "value"],
+        ],
+        how="inner",
+        on=change_cols,
+    )
+    legislative_changes = (
+        legislative_changes.loc[
+            legislative_changes["changes_baseline_date"] > legislative_changes["baseline_date"], :
+        ]
+        .groupby(projection_cols)["value"]
+        .sum()
+        .rename("legislative_change")
+    )
+
+    projections = projections.join(legislative_changes, on=projection_cols)
+    projections["adjusted_projection"] = projections["value"] + projections[
+        "legislative_change"
+    ].fillna(0)
+
+    return projections[projection_cols + ["baseline_date", "adjusted_projection"]]
+
+
+def start_nowcast(projections, seasonal_shares, key_cols=key_cols, months=months):
+    """
+    Start nowcasting the budget-year projection errors of a fiscal year,
+    before any of its monthly actuals are received.
+
+    Parameters
+    ----------
+    projections : pandas.DataFrame
+        Budget-year projections, created by `get_budget_year_projections()`
+
+    seasonal_shares : pandas.DataFrame
+        Cumulative seasonal shares, created by `calc_seasonal_shares()`
+
+    key_cols : list of str, optional
+        A list of columns identifying the series; the optional key columns
+        of `projections` (such as `source`) are added
+        (default is key_cols, defined above)
+
+    months : list of int, optional
+        The months of the fiscal year (default is months, defined above)
+
+    Returns
+    -------
+    dict
+        The state of the nowcast, updated by `update_nowcast()`:
+            - key_cols: the columns identifying the series
+            - keys: the key columns of each series, with its baseline date
+              and adjusted projection
+            - positions: positions of the series in `keys`, for each set of
+              key columns the monthly actuals are matched on (filled in by
+              `update_nowcast()`)
+            - shares: array of cumulative seasonal shares, with one row for
+              each series and one column for each month (missing for
+              series without history)
+            - received: actual value received so far, for each series
+            - received_months: whether each month was received, with one
+              row for each series and one column for each month
+            - last_month: last month received, for each series (0 before
+              any is received)
+
+    Raises
+    ------
+    AssertionError
+        If the key columns do not identify the series of `projections`
+    """
+    key_cols = add_optional_keys(key_cols, projections)
+    keys = projections.reset_index(drop=True)
+
+    assert_message = f"The columns {key_cols} do not identify the projections."
+    assert not keys.duplicated(key_cols).any(), assert_message
+
+    share_index = pd.MultiIndex.from_frame(keys[list(seasonal_shares.index.names)])
+
+    state = {
+        "key_cols": key_cols,
+        "keys": keys,
+        "positions": {},
+        "shares": seasonal_shares.reindex(share_index).to_numpy(dtype="float"),
+        "received": np.zeros(len(keys)),
+        "received_months": np.zeros((len(keys), len(months)), dtype="bool"),
+        "last_month": np.zeros(len(keys), dtype="int"),
+    }
+
+    return state
+
+
+def update_nowcast(state, monthly_actuals, key_cols=key_cols):
+    """
+    Add newly received monthly actuals to the state of a nowcast.
+
+    Parameters
+    ----------
+    state : dict
+        The state of the nowcast, created by `start_nowcast()`; updated in
+        place
+
+    monthly_actuals : pandas.DataFrame
+        DataFrame containing the actual values of the months received, with
+        the columns `key_cols`, `month` (1 is October), and `value`, and
+        any other key columns of the state they are specific to (for example, `vintage`). Rows of series that are
+        not nowcast are ignored.
+
+    key_cols : list of str, optional
+        A list of columns the monthly actuals must have
+        (default is key_cols, defined above)
+
+    Returns
+    -------
+    dict
+        The updated state
+
+    Raises
+    ------
+    AssertionError
+        If a month of a series was already received, or is received twice
+
+    Notes
+    -----
+    The actuals are matched to the series on the key columns they share
+    with the state, so actuals without a `source` column update the series
+    of every source. Each update only adds the new values to the running
+    totals of their series, so it takes time proportional to the number of
+    rows received, whatever the number of months already received.
+    """
+    match_cols = [col for col in state["key_cols"] if col in monthly_actuals.columns]
+    assert_message = f"The monthly actuals must have the columns {key_cols}."
+    assert all(col in match_cols for col in key_cols), assert_message
+
+    # Positions of the series of each key, found once for each set of columns
+    if tuple(match_cols) not in state["positions"]:
+        state["positions"][tuple(match_cols)] = (
+            state["keys"].groupby(match_cols, sort=False).indices
+        )
+    key_positions = state["positions"][tuple(match_cols)]
+
+    row_positions = [
+        key_positions.get(key, np.zeros(0, dtype="int"))
+        for key in monthly_actuals[match_cols].itertuples(index=False, name=None)
+    ]
+    num_positions = np.array([len(row) for row in row_positions], dtype="int")
+    positions = np.concatenate([np.zeros(0, dtype="int")] + row_positions).astype("int")
+    values = np.repeat(monthly_actuals["value"].to_numpy(dtype="float"), num_positions)
+    month_numbers = np.repeat(monthly_actuals["month"].to_numpy(dtype="int"), num_positions)
+
+    # Each month of a series is only received once
+    month_positions = month_numbers - 1
+    received = state["received_months"][positions, month_positions]
+    received[pd.Series(zip(positions, month_positions)).duplicated().to_numpy()] = True
+    example = state["keys"].loc[positions[received], state["key_cols"]].head(1)
+    assert_message = (
+        f"Some months were already received, for example {example.to_dict('records')}; "
+        "start a new nowcast to replace them."
+    )
+    assert not received.any(), assert_message
+
+    np.add.at(state["received"], positions, values)
+    np.maximum.at(state["last_month"], positions, month_numbers)
+    state["received_months"][positions, month_positions] = True
+
+    return state
+
+
+def calc_nowcast(state):
+    """
+    Estimate the budget-year projection errors from the monthly actuals
+    received so far.
+
+    Parameters
+    ----------
+    state : dict
+        The state of the nowcast, created by `start_nowcast()` and updated
+        by `update_nowcast()`
+
+    Returns
+    -------
+    pandas.DataFrame
+        The `keys` of the state, with the columns:
+            - last_month: last month received (0 before any is received)
+            - received: actual value received so far
+            - seasonal_share: average share of the fiscal year's value
+              received by the end of the last month
+            - estimated_actual: received / seasonal_share
+            - estimated_error: estimated projection error, with the sign
+              convention of `errors.calc_errors()`
+            - estimated_error_pct_actual: estimated_error as a percent of
+              estimated_actual
+
+        Estimates are missing before any month is received, and for series
+        without seasonal shares.
+    """
+    last_month = state["last_month"]
+    has_months = last_month > 0
+    seasonal_share = np.full(len(last_month), np.nan)
+    seasonal_share[has_months] = state["shares"][has_months.nonzero()[0], last_month[has_months] - 1]
+
+    nowcast = state["keys"].copy()
+    nowcast["last_month"] = last_month
+    nowcast["received"] = state["received"]
+    nowcast["seasonal_share"] = seasonal_share
+    nowcast["estimated_actual"] = state["received"] / seasonal_share
+
+    signs = nowcast["component"].map(error_signs).to_numpy(dtype="float")
+    nowcast["estimated_error"] = (
+        nowcast["adjusted_projection"] - nowcast["estimated_actual"]
+    ) * signs
+    nowcast["estimated_error_pct_actual"] = (
+        nowcast["estimated_error"] / nowcast["estimated_actual"] * 100
+    )
+
+    return nowcast
+
+
+if __name__ == "__main__":
+    assert_message = (
+        "Usage: python src/nowcast.py [fiscal year] [monthly history file] [monthly actuals file]"
+    )
+    assert len(sys.argv[1:]) == 3, assert_message
+    fiscal_year = int(sys.argv[1])
+
+    actuals, baselines, changes, GDP = read_inputs(INPUT_PATH)
+    monthly_history = pd.read_csv(sys.argv[2])
+    monthly_actuals = pd.read_csv(sys.argv[3])
+
+    state = start_nowcast(
+        get_budget_year_projections(baselines, changes, fiscal_year),
+        calc_seasonal_shares(monthly_history),
+    )
+
+    # Replay the months in the order they were received
+    for month, month_actuals in monthly_actuals.groupby("month"):
+        update_nowcast(state, month_actuals)
+        nowcast = calc_nowcast(state)
+        totals = nowcast.loc[nowcast["category"] == "Total", :]
+
+        print(f"Month {month}:")
+        estimate_cols = ["estimated_actual", "estimated_error", "estimated_error_pct_actual"]
+        print(totals[state["key_cols"] + estimate_cols].to_string(index=False))
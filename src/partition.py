@@ -0,0 +1,193 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from merge import merge_data, sort_data, sort_cols, add_optional_keys
+from errors import calc_errors
+from summary import calc_summary_stats, group_cols
+
+# Columns defining the key space that is partitioned into shards. Every
+# calculation (including the cumulative debt changes) is done within a
+# category and subcategory, so shards of those keys can be run independently.
+shard_cols = ["category", "subcategory"]
+
+
+def assign_shards(dfs, num_shards, method="hash", shard_cols=shard_cols):
+    """
+    Assign each category and subcategory of the input data to a shard.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    num_shards : int
+        Number of shards
+
+    method : str, optional
+        "hash" to assign keys to shards by a hash of their values, or
+        "range" to split the sorted keys into contiguous ranges
+        (default is "hash")
+
+    shard_cols : list of str, optional
+        Columns defining the keys that are assigned to shards
+        (default is shard_cols, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each key in the baselines, with the
+        `shard_cols` and a `shard` column containing the shard number
+    """
+    assert method in ["hash", "range"], "Invalid partitioning method."
+
+    actuals, baselines, changes, GDP = dfs
+
+    keys = (
+        baselines[shard_cols]
+        .drop_duplicates()
+        .sort_values(shard_cols)
+        .reset_index(drop=True)
+    )
+
+    if method == "hash":
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        keys["shard"] = (hashes % np.uint64(num_shards)).astype("int")
+    else:
+        keys["shard"] = np.arange(len(keys)) * num_shards // len(keys)
+
+    return keys
+
+
+def split_inputs(dfs, shard_keys, shard_cols=shard_cols):
+    """
+    Split the input data into shards.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    shard_keys : pandas.DataFrame
+        Shard of each key, created by `assign_shards()`
+
+    shard_cols : list of str, optional
+        Columns defining the keys that are assigned to shards
+        (default is shard_cols, defined above)
+
+    Returns
+    -------
+    list of tuple
+        A tuple of (actuals, baselines, changes, GDP) DataFrames for each
+        non-empty shard, in order of shard number. GDP is not split.
+    """
+    actuals, baselines, changes, GDP = dfs
+
+    shard_dfs = []
+    for shard, keys in shard_keys.groupby("shard"):
+        keys = keys[shard_cols]
+        shard_dfs.append(
+            tuple(
+                pd.merge(df, keys, how="inner", on=shard_cols)
+                for df in [actuals, baselines, changes]
+            )
+            + (GDP,)
+        )
+
+    return shard_dfs
+
+
+def run_shard(dfs, component):
+    """
+    Calculate projection errors and summary statistics for one shard.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames of the shard
+
+    component : str
+        The component for which data are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        The projection errors and the summary statistics of the shard
+    """
+    projection_data = merge_data(dfs, component)
+    projection_errors = calc_errors(projection_data, component)
+    summary_stats = calc_summary_stats(projection_errors, component)
+
+    return projection_errors, summary_stats
+
+
+def run_partitioned(dfs, component, num_shards, num_workers=1, method="hash"):
+    """
+    Calculate projection errors and summary statistics for a component on
+    shards of the category and subcategory key space.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    component : str
+        The component for which data are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    num_shards : int
+        Number of shards
+
+    num_workers : int, optional
+        Number of processes running the shards; with 1 worker, the shards
+        are run in the current process (default is 1)
+
+    method : str, optional
+        Partitioning method, "hash" or "range" (see `assign_shards()`)
+        (default is "hash")
+
+    Returns
+    -------
+    projection_errors : pandas.DataFrame
+        Projection errors, the same as from `errors.calc_errors()`
+
+    summary_stats : pandas.DataFrame
+        Summary statistics, the same as from
+        `summary.calc_summary_stats()`
+
+    Notes
+    -----
+    The results of the shards are concatenated and sorted in the same
+    order as unpartitioned results, so they do not depend on the number
+    of shards, the partitioning method, or the number of workers.
+    """
+    assert component in ["outlay", "revenue", "deficit", "debt"]
+
+    shard_keys = assign_shards(dfs, num_shards, method)
+    shard_dfs = split_inputs(dfs, shard_keys)
+    components = [component] * len(shard_dfs)
+
+    if num_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            results = list(pool.map(run_shard, shard_dfs, components))
+    else:
+        results = [run_shard(*args) for args in zip(shard_dfs, components)]
+
+    shard_errors, shard_stats = zip(*results)
+
+    projection_errors = pd.concat(shard_errors)
+    projection_errors = sort_data(
+        projection_errors, component, sort_cols=add_optional_keys(sort_cols, projection_errors)
+    )
+
+    summary_stats = pd.concat(shard_stats)
+    summary_stats = sort_data(
+        summary_stats, component, sort_cols=add_optional_keys(group_cols, summary_stats)
+    )
+    summary_stats = summary_stats.reset_index(drop=True)
+
+    return projection_errors, summary_stats
@@ -1,4 +1,5 @@
 import pandas as pd
+from merge import vintage_col, add_optional_keys
 
 
 def scale_actuals(actuals, GDP):
@@ -23,11 +24,17 @@ def scale_actuals(actuals, GDP):
     Notes
     -----
     - The function merges the actuals and GDP data based on the fiscal year.
+    - If the actuals or GDP have a `vintage` column, the result has the
+      shares of every vintage (see `merge.broadcast_vintages()`).
     - It calculates the share of actuals as (actual_value / GDP) * 100.
     - Data for "Fannie Freddie" oultays are filtered out.
     """
 
-    actuals_GDP = pd.merge(actuals, GDP, how="left", on=["fiscal_year"])
+    merge_keys = ["fiscal_year"]
+    if vintage_col in actuals.columns and vintage_col in GDP.columns:
+        merge_keys.append(vintage_col)
+
+    actuals_GDP = pd.merge(actuals, GDP, how="left", on=merge_keys)
 
     actuals_GDP["actuals_pct_GDP"] = (
         actuals_GDP["actual_value"] / actuals_GDP["GDP"] * 100
@@ -46,4 +53,4 @@ def scale_actuals(actuals, GDP):
         "actuals_pct_GDP",
     ]
 
-    return actuals_GDP[output_cols]
+    return actuals_GDP[add_optional_keys(output_cols, actuals_GDP)]
@@ -0,0 +1,317 @@
+from collections import OrderedDict
+import copy
+import glob
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os.path
+import sys
+import threading
+from urllib.parse import parse_qs, unquote, urlsplit
+import pandas as pd
+from ExcelWriter.worksheets import worksheets
+from ExcelWriter.make_data_underlying_figures import make_all_data
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
+
+host = "127.0.0.1"
+port = 8000
+
+# Number of responses kept in the response cache
+cache_size = 1024
+
+# Number of connections waiting to be accepted before new ones are refused
+request_queue_size = 128
+
+# Results served, loaded by `load_results()`, and their generation (the
+# number of times they were loaded)
+results = {"generation": 0, "tables": {}, "figures": {}}
+reload_lock = threading.Lock()
+
+# Responses cached by `get_response()`, least recently used first
+responses = OrderedDict()
+cache_lock = threading.Lock()
+
+
+def load_results(output_path=OUTPUT_PATH):
+    """
+    Load the output files of `main.py` and the data underlying the figures.
+
+    Parameters
+    ----------
+    output_path : str, optional
+        Path to the directory of the output files
+        (default is OUTPUT_PATH, defined above)
+
+    Returns
+    -------
+    dict
+        A dictionary with the output files (`tables`), keyed by file name
+        without the `.csv` extension, and the data underlying the figures
+        (`figures`), keyed by worksheet name
+    """
+    tables = {
+        os.path.splitext(os.path.basename(filepath))[0]: pd.read_csv(filepath)
+        for filepath in sorted(glob.glob(os.path.join(output_path, "*.csv")))
+    }
+    figures = {
+        name: worksheet["data"]
+        for name, worksheet in make_all_data(copy.deepcopy(worksheets), output_path=output_path).items()
+        if "data" in worksheet
+    }
+
+    return {"tables": tables, "figures": figures}
+
+
+def reload_results():
+    """
+    Reload the results served, as a new generation, and clear the response
+    cache.
+
+    Returns
+    -------
+    None
+    """
+    global results
+
+    with reload_lock:
+        loaded = load_results()
+        with cache_lock:
+            loaded["generation"] = results["generation"] + 1
+            results = loaded
+            responses.clear()
+
+    return None
+
+
+def get_response(current, kind, name, query, cache_size=cache_size):
+    """
+    Get the response to a request for a table or figure, from the response
+    cache if possible.
+
+    Parameters
+    ----------
+    current : dict
+        The results when the request was received (see `load_results()`),
+        with their generation
+
+    kind, name, query
+        The table or figure requested, and the query (see
+        `make_response()`)
+
+    cache_size : int, optional
+        Number of responses kept in the response cache
+        (default is cache_size, defined above)
+
+    Returns
+    -------
+    tuple
+        The status, content type, and body of the response
+
+    Notes
+    -----
+    Responses are cached (least recently used responses are discarded
+    first), so repeated requests are answered without filtering the data
+    again. Only responses made from the results currently served are
+    cached: the check and the reload of the results (which clears the
+    cache) hold the same lock, so a request received before a reload
+    never stores its response for requests received after it.
+    """
+    key = (current["generation"], kind, name, query)
+    with cache_lock:
+        if key in responses:
+            responses.move_to_end(key)
+            return responses[key]
+
+    response = make_response(current, kind, name, query)
+
+    with cache_lock:
+        if current["generation"] == results["generation"]:
+            responses[key] = response
+            while len(responses) > cache_size:
+                responses.popitem(last=False)
+
+    return response
+
+
+def make_response(current, kind, name, query):
+    """
+    Make the response to a request for a table or figure.
+
+    Parameters
+    ----------
+    current : dict
+        The results the response is made from (see `load_results()`)
+
+    kind : str
+        "tables" or "figures"
+
+    name : str
+        Name of the table or figure
+
+    query : tuple
+        Sorted (parameter, values) pairs of the query string. The `format`
+        parameter ("json", the default, or "csv") sets the format of the
+        response, and `columns` (comma-separated) the columns returned.
+        Other parameters select the rows whose column of the same name has
+        one of the values.
+
+    Returns
+    -------
+    status : int
+        HTTP status code
+
+    content_type : str
+        Content type of the response
+
+    body : bytes
+        Body of the response
+    """
+    if name not in current[kind]:
+        return error_response(404, f"Unknown {kind[:-1]} {name!r}.")
+
+    df = current[kind][name]
+    params = dict(query)
+    response_format = params.pop("format", ("json",))[-1]
+    columns = params.pop("columns", None)
+
+    unknown_cols = [col for col in params if col not in df.columns]
+    if columns is not None:
+        columns = [col for value in columns for col in value.split(",")]
+        unknown_cols += [col for col in columns if col not in df.columns]
+    if len(unknown_cols) > 0:
+        return error_response(400, f"Unknown columns {unknown_cols}.")
+
+    selected = pd.Series(True, index=df.index)
+    for col, values in params.items():
+        selected &= df[col].astype("str").isin(values)
+    df = df.loc[selected, columns if columns is not None else df.columns]
+
+    if response_format == "csv":
+        return 200, "text/csv; charset=utf-8", df.to_csv(index=False).encode("utf-8")
+    if response_format == "json":
+        return 200, "application/json", df.to_json(orient="records").encode("utf-8")
+
+    return error_response(400, f"Unknown format {response_format!r}.")
+
+
+def error_response(status, message):
+    """
+    Make an error response.
+
+    Parameters
+    ----------
+    status : int
+        HTTP status code
+
+    message : str
+        Description of the error
+
+    Returns
+    -------
+    tuple
+        The status, content type, and body of the response
+    """
+    return status, "application/json", json.dumps({"error": message}).encode("utf-8")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handler of the requests to the query service.
+
+    Endpoints:
+        - GET /tables and GET /figures: names of the tables and figures
+        - GET /tables/[name] and GET /figures/[name]: rows of a table or
+          figure (see `make_response()` for the query parameters)
+        - POST /reload: reload the results (for example, after `main.py`
+          is run again)
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        current = results
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+
+        if len(parts) == 1 and parts[0] in ["tables", "figures"]:
+            response = 200, "application/json", json.dumps(list(current[parts[0]])).encode("utf-8")
+        elif len(parts) == 2 and parts[0] in ["tables", "figures"]:
+            query = parse_qs(url.query, keep_blank_values=True)
+            query = tuple(sorted((key, tuple(values)) for key, values in query.items()))
+            response = get_response(current, parts[0], parts[1], query)
+        else:
+            response = error_response(404, f"Unknown path {url.path!r}.")
+
+        self.send(*response)
+
+    def do_POST(self):
+        if urlsplit(self.path).path.strip("/") == "reload":
+            reload_results()
+            response = 200, "application/json", json.dumps({"reloaded": True}).encode("utf-8")
+        else:
+            response = error_response(404, f"Unknown path {self.path!r}.")
+
+        self.send(*response)
+
+    def send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Requests are not logged, to keep latency low
+        pass
+
+
+class QueryServer(ThreadingHTTPServer):
+    """
+    Server handling each request in its own thread, with a longer queue of
+    waiting connections than the default (5) for bursts of requests.
+    """
+
+    daemon_threads = True
+    request_queue_size = request_queue_size
+
+
+def serve(host=host, port=port):
+    """
+    Serve the results of `main.py` over HTTP until interrupted.
+
+    Parameters
+    ----------
+    host : str, optional
+        Address the server listens on; by default, only local requests
+        are accepted (default is host, defined above)
+
+    port : int, optional
+        Port the server listens on (default is port, defined above)
+
+    Returns
+    -------
+    None
+
+    Notes
+    -----
+    Each request is handled in its own thread, so many requests can be
+    served concurrently.
+    """
+    reload_results()
+
+    server = QueryServer((host, port), RequestHandler)
+    print(f"Serving results at http://{host}:{port} (press Ctrl-C to stop)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped serving.")
+    finally:
+        server.server_close()
+
+    return None
+
+
+if __name__ == "__main__":
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else port)
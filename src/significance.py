@@ -0,0 +1,119 @@
+import math
+import numpy as np
+from errors import error_measures
+from merge import add_optional_keys
+from summary import seasons, group_cols, stack_seasons
+
+
+def calc_bias_tests(errors, component, seasons=seasons, group_cols=group_cols):
+    """
+    Test whether the average projection error differs from zero, with
+    standard errors robust to the overlap of errors across baselines, for a
+    given budgetary component.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined in summary.py)
+
+    group_cols : list of str, optional
+        A list of columns to group by when testing; must include
+        `projected_year_number`
+        (default is group_cols, defined in summary.py)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each group, with the columns:
+            - group_cols
+            - number_of_projections: number of errors in the group
+            - lags: number of autocovariances in the standard error
+            - average_error: average of the errors
+            - naive_standard_error: standard error assuming independent
+              errors
+            - standard_error: Newey-West standard error
+            - t_statistic: average_error / standard_error
+            - p_value: two-sided p-value of the t statistic, from the
+              normal distribution
+
+    Notes
+    -----
+    A projection of the nth year's value made in one baseline covers n - 1
+    years also covered by the projection of the following baseline, so
+    errors of consecutive baselines are correlated up to n - 1 baselines
+    apart. The standard errors therefore include the autocovariances of
+    each group's errors, in baseline order, up to n - 1 lags (fewer if the
+    group has fewer errors), weighted by the Bartlett kernel
+    1 - lag / (lags + 1), as in Newey and West (1987).
+
+    All groups are handled at once: the errors are sorted once by group and
+    baseline, and the autocovariances at each lag are summed for every
+    group with a single `numpy.bincount()`, so only the lags are looped
+    over.
+    """
+    group_cols = add_optional_keys(group_cols, errors)
+    error_col = error_measures[component]
+
+    stacked_errors = stack_seasons(errors, component, seasons)
+    stacked_errors = stacked_errors.loc[
+        stacked_errors[error_col].notna(), group_cols + ["baseline_date", error_col]
+    ]
+
+    # A single sort puts each group's errors together, in baseline order
+    sorted_errors = stacked_errors.sort_values(group_cols + ["baseline_date"]).reset_index(drop=True)
+    codes = sorted_errors.groupby(group_cols, observed=True, sort=False).ngroup().to_numpy()
+    new_group = np.diff(codes, prepend=-1) != 0
+    starts = np.flatnonzero(new_group)
+    counts = np.diff(np.append(starts, len(sorted_errors)))
+
+    values = sorted_errors[error_col].to_numpy(dtype="float")
+    group_idx = np.repeat(np.arange(len(starts)), counts)
+    num_groups = len(starts)
+
+    keys = sorted_errors.loc[starts, group_cols].reset_index(drop=True)
+    lags = np.minimum(keys["projected_year_number"].to_numpy() - 1, counts - 1)
+
+    averages = np.bincount(group_idx, weights=values, minlength=num_groups) / counts
+    deviations = values - averages[group_idx]
+
+    # Long-run variance: variance plus the weighted autocovariances
+    long_run_variances = np.bincount(group_idx, weights=deviations**2, minlength=num_groups) / counts
+    for lag in range(1, lags.max(initial=0) + 1):
+        # Pairs of errors `lag` baselines apart in the same group
+        same_group = group_idx[lag:] == group_idx[:-lag]
+        products = np.where(same_group, deviations[lag:] * deviations[:-lag], 0.0)
+        autocovariances = np.bincount(group_idx[lag:], weights=products, minlength=num_groups) / counts
+
+        kernel_weights = np.where(lag <= lags, 1 - lag / (lags + 1), 0.0)
+        long_run_variances += 2 * kernel_weights * autocovariances
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        naive_standard_errors = np.sqrt(
+            np.bincount(group_idx, weights=deviations**2, minlength=num_groups)
+            / (counts - 1)
+            / counts
+        )
+        standard_errors = np.sqrt(np.maximum(long_run_variances, 0) / counts)
+        t_statistics = averages / standard_errors
+
+    p_values = np.array([math.erfc(abs(t) / math.sqrt(2)) for t in t_statistics])
+
+    bias_tests = keys.copy()
+    bias_tests["number_of_projections"] = counts
+    bias_tests["lags"] = lags
+    bias_tests["average_error"] = averages
+    bias_tests["naive_standard_error"] = np.where(counts > 1, naive_standard_errors, np.nan)
+    bias_tests["standard_error"] = np.where(counts > 1, standard_errors, np.nan)
+    bias_tests["t_statistic"] = np.where(counts > 1, t_statistics, np.nan)
+    bias_tests["p_value"] = np.where(counts > 1, p_values, np.nan)
+
+    return bias_tests
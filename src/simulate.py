@@ -0,0 +1,230 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+shard_size = 100_000
+
+path_percentiles = [5, 10, 25, 50, 75, 90, 95]
+
+
+def make_error_matrix(errors, error_col="projection_error_pct_GDP"):
+    """
+    Arrange projection errors into a vintage by projection year matrix.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors for a single
+        series (for example, total deficits), with one row for each
+        baseline and projection year
+
+    error_col : str, optional
+        Name of the projection error column
+        (default is "projection_error_pct_GDP")
+
+    Returns
+    -------
+    error_matrix : pandas.DataFrame
+        DataFrame with one row for each baseline (`baseline_date`) and one
+        column for each projection year (`projected_year_number`).
+        Errors for projection years that are not yet known are missing.
+    """
+    error_matrix = errors.pivot(
+        index="baseline_date",
+        columns="projected_year_number",
+        values=error_col,
+    )
+
+    return error_matrix
+
+
+def simulate_debt_paths(
+    deficit_errors,
+    baseline,
+    num_paths=100_000,
+    seed=0,
+    num_workers=1,
+    shard_size=shard_size,
+):
+    """
+    Simulate debt-to-GDP paths around a baseline debt projection by
+    resampling historical deficit projection errors.
+
+    Parameters
+    ----------
+    deficit_errors : pandas.DataFrame
+        DataFrame containing projection errors of total deficits, such as
+        `deficit_projection_errors.csv`
+
+    baseline : pandas.DataFrame
+        DataFrame containing the baseline debt projection (rows with
+        `component` equal to "debt"), with the columns
+        `projected_year_number`, `value` (debt, in billions of dollars),
+        and `GDP` (projected GDP, in billions of dollars)
+
+    num_paths : int, optional
+        Number of debt paths to simulate (default is 100,000)
+
+    seed : int, optional
+        Seed of the random number generator (default is 0)
+
+    num_workers : int, optional
+        Number of processes used to simulate the paths; with 1 worker, the
+        paths are simulated in the current process (default is 1)
+
+    shard_size : int, optional
+        Number of paths simulated by each shard
+        (default is shard_size, defined above)
+
+    Returns
+    -------
+    paths : pandas.DataFrame
+        DataFrame with one row for each simulated path and one column for
+        each projection year of the baseline with historical errors,
+        containing debt as a percent of GDP
+
+    Raises
+    ------
+    AssertionError
+        If `num_paths` or `shard_size` is not positive
+
+    Notes
+    -----
+    Each path draws a whole historical vintage (baseline) of deficit
+    errors, so the correlation of errors across projection years within
+    a vintage is preserved. Projection years not yet known for the drawn
+    vintage are drawn from the vintages for which they are known.
+
+    As in the debt component of `merge.aggregate_changes()`, errors in
+    debt are the cumulative effects of errors in deficits. Deficit errors
+    are actual minus projected deficits (see `errors.error_signs`), so the
+    simulated debt in a projection year is the projected debt minus the
+    cumulative deficit errors (converted to dollars with projected GDP)
+    through that year.
+
+    The paths are simulated in shards of `shard_size` paths, each with
+    its own random number generator spawned from `seed`, so the results
+    are the same whatever the number of workers.
+    """
+    assert num_paths > 0, f"The number of paths must be positive, not {num_paths}."
+    assert shard_size > 0, f"The shard size must be positive, not {shard_size}."
+
+    error_matrix = make_error_matrix(deficit_errors)
+
+    # Only simulate the projection years with historical errors
+    debt = baseline.loc[
+        (baseline["component"] == "debt")
+        & (baseline["projected_year_number"].isin(error_matrix.columns)),
+        :,
+    ]
+    debt = debt.sort_values("projected_year_number")
+    horizons = debt["projected_year_number"].to_numpy()
+
+    error_matrix = error_matrix.loc[:, horizons]
+
+    projection = debt["value"].to_numpy(dtype="float")
+    GDP = debt["GDP"].to_numpy(dtype="float")
+    errors = error_matrix.to_numpy(dtype="float")
+
+    # Shards of paths, each with an independent random number generator
+    num_shards = -(-num_paths // shard_size)
+    shard_paths = [shard_size] * (num_shards - 1) + [num_paths - shard_size * (num_shards - 1)]
+    shard_seeds = np.random.SeedSequence(seed).spawn(num_shards)
+    shard_args = [
+        (errors, projection, GDP, n, shard_seed)
+        for n, shard_seed in zip(shard_paths, shard_seeds)
+    ]
+
+    if num_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            results = list(pool.map(simulate_shard, *zip(*shard_args)))
+    else:
+        results = [simulate_shard(*args) for args in shard_args]
+
+    paths = pd.DataFrame(np.concatenate(results), columns=horizons)
+    paths.columns.name = "projected_year_number"
+
+    return paths
+
+
+def simulate_shard(errors, projection, GDP, num_paths, seed):
+    """
+    Simulate one shard of debt-to-GDP paths.
+
+    Parameters
+    ----------
+    errors : numpy.ndarray
+        Vintage by projection year matrix of deficit errors, in percent of
+        GDP, with missing values for unknown errors
+
+    projection : numpy.ndarray
+        Projected debt in each projection year, in billions of dollars
+
+    GDP : numpy.ndarray
+        Projected GDP in each projection year, in billions of dollars
+
+    num_paths : int
+        Number of paths to simulate
+
+    seed : numpy.random.SeedSequence or int
+        Seed of the random number generator
+
+    Returns
+    -------
+    numpy.ndarray
+        Matrix of simulated debt, in percent of GDP, with one row for each
+        path and one column for each projection year
+    """
+    rng = np.random.default_rng(seed)
+    num_vintages, num_horizons = errors.shape
+    known = ~np.isnan(errors)
+
+    # Draw a whole vintage for each path
+    vintages = rng.integers(num_vintages, size=num_paths)
+    draws = np.broadcast_to(vintages[:, np.newaxis], (num_paths, num_horizons)).copy()
+
+    # Replace unknown errors with draws from vintages with known errors
+    for h in range(num_horizons):
+        known_vintages = np.flatnonzero(known[:, h])
+        unknown = ~known[draws[:, h], h]
+        draws[unknown, h] = known_vintages[
+            rng.integers(len(known_vintages), size=unknown.sum())
+        ]
+
+    deficit_errors = errors[draws, np.arange(num_horizons)]
+
+    # Debt errors are the cumulative deficit errors, in dollars
+    cum_errors = np.cumsum(deficit_errors * GDP / 100, axis=1)
+    debt = projection - cum_errors
+
+    return debt / GDP * 100
+
+
+def summarize_paths(paths, percentiles=path_percentiles):
+    """
+    Calculate percentiles of simulated paths for each projection year.
+
+    Parameters
+    ----------
+    paths : pandas.DataFrame
+        Simulated paths, created by `simulate_debt_paths()`
+
+    percentiles : list of int, optional
+        Percentiles to calculate
+        (default is path_percentiles, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each projection year and one column for
+        each percentile (`p[percentile]`)
+    """
+    values = np.percentile(paths.to_numpy(), percentiles, axis=0)
+
+    summary = pd.DataFrame(
+        values.T,
+        index=paths.columns,
+        columns=[f"p{p}" for p in percentiles],
+    )
+
+    return summary.reset_index()
@@ -0,0 +1,273 @@
+import glob
+import os.path
+import sqlite3
+import pandas as pd
+from data_io import input_files
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+INPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../input_data")
+OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
+DATABASE_FILE = os.path.abspath(f"{OUTPUT_PATH}/projection_errors.sqlite")
+
+# Columns indexed in every table that has them, in this order
+index_cols = ["component", "category", "subcategory", "projected_year_number", "baseline_date"]
+
+sql_types = {"b": "BOOLEAN", "i": "INTEGER", "u": "INTEGER", "f": "REAL"}
+
+# Boolean columns are stored as integers and converted back when read
+sqlite3.register_converter("BOOLEAN", lambda value: bool(int(value)))
+
+
+def connect(database_file=DATABASE_FILE):
+    """
+    Connect to the SQLite database.
+
+    Parameters
+    ----------
+    database_file : str, optional
+        Path to the SQLite database file
+        (default is DATABASE_FILE, defined above)
+
+    Returns
+    -------
+    sqlite3.Connection
+        Connection converting the columns declared BOOLEAN to booleans
+    """
+    return sqlite3.connect(database_file, detect_types=sqlite3.PARSE_DECLTYPES)
+
+
+def write_store(tables, database_file=DATABASE_FILE, index_cols=index_cols):
+    """
+    Write DataFrames to tables of the SQLite database.
+
+    Parameters
+    ----------
+    tables : dict
+        A dictionary of DataFrames, keyed by table name. Existing tables
+        with the same names are replaced.
+
+    database_file : str, optional
+        Path to the SQLite database file
+        (default is DATABASE_FILE, defined above)
+
+    index_cols : list of str, optional
+        Columns indexed in every table that has them, in this order
+        (default is index_cols, defined above)
+
+    Returns
+    -------
+    None; Writes the tables to the database file.
+
+    Notes
+    -----
+    The rows of each table are inserted with a single `executemany()`,
+    and all tables are written in one transaction, so readers never see a
+    partially written database. The rows are stored in the order of the
+    DataFrames, which `query()` preserves.
+    """
+    connection = connect(database_file)
+    try:
+        with connection:
+            for name, df in tables.items():
+                columns = [
+                    f'"{col}" {sql_types.get(df[col].dtype.kind, "TEXT")}'
+                    for col in df.columns
+                ]
+                connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+                connection.execute(f'CREATE TABLE "{name}" ({", ".join(columns)})')
+
+                # Missing values are stored as NULL
+                rows = df.astype(object).where(df.notna(), None).itertuples(index=False)
+                placeholders = ", ".join(["?"] * len(df.columns))
+                connection.executemany(f'INSERT INTO "{name}" VALUES ({placeholders})', rows)
+
+                table_index_cols = [col for col in index_cols if col in df.columns]
+                if len(table_index_cols) > 0:
+                    quoted_cols = ", ".join(f'"{col}"' for col in table_index_cols)
+                    connection.execute(f'CREATE INDEX "{name}_index" ON "{name}" ({quoted_cols})')
+    finally:
+        connection.close()
+
+    return None
+
+
+def build_store(
+    input_path=INPUT_PATH,
+    output_path=OUTPUT_PATH,
+    database_file=DATABASE_FILE,
+    input_files=input_files,
+):
+    """
+    Write the input data and the output files of `main.py` to the SQLite
+    database.
+
+    Parameters
+    ----------
+    input_path : str, optional
+        Path to the directory containing the input data files
+        (default is INPUT_PATH, defined above)
+
+    output_path : str, optional
+        Path to the directory containing the output files
+        (default is OUTPUT_PATH, defined above)
+
+    database_file : str, optional
+        Path to the SQLite database file
+        (default is DATABASE_FILE, defined above)
+
+    input_files : dict, optional
+        A dictionary containing the file names of the input data
+        (default is input_files, defined in data_io.py)
+
+    Returns
+    -------
+    list of str
+        Names of the tables written. Each input is written to a table
+        named after it (`actuals`, `baselines`, `changes`, `GDP`), and each
+        output file to a table named after the file, without the `.csv`
+        extension (for example, `deficit_projection_errors`).
+    """
+    tables = {
+        name: pd.read_csv(os.path.join(input_path, filename))
+        for name, filename in input_files.items()
+    }
+    for filepath in sorted(glob.glob(os.path.join(output_path, "*.csv"))):
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        tables[name] = pd.read_csv(filepath)
+
+    write_store(tables, database_file)
+
+    return list(tables)
+
+
+def make_where_clause(filters):
+    """
+    Make the WHERE clause of a query from filters.
+
+    Parameters
+    ----------
+    filters : dict or None
+        A dictionary of the values to select, keyed by column. A list of
+        values selects any of them; a single value selects that value.
+
+    Returns
+    -------
+    clause : str
+        The WHERE clause (empty without filters)
+
+    params : list
+        Values of the clause's placeholders
+    """
+    conditions, params = [], []
+    for col, values in (filters or {}).items():
+        if isinstance(values, (list, tuple, set)):
+            values = list(values)
+            conditions.append(f'"{col}" IN ({", ".join(["?"] * len(values))})')
+            params += values
+        else:
+            conditions.append(f'"{col}" = ?')
+            params.append(values)
+
+    clause = f"WHERE {' AND '.join(conditions)}" if len(conditions) > 0 else ""
+
+    return clause, params
+
+
+def query(table, filters=None, columns=None, database_file=DATABASE_FILE):
+    """
+    Select rows of a table of the SQLite database.
+
+    Parameters
+    ----------
+    table : str
+        Name of the table (see `build_store()`)
+
+    filters : dict, optional
+        A dictionary of the values to select, keyed by column (for
+        example, `{"category": "Total", "projected_year_number": [2, 6]}`);
+        by default, all rows are selected
+
+    columns : list of str, optional
+        Columns to select; by default, all columns are selected
+
+    database_file : str, optional
+        Path to the SQLite database file
+        (default is DATABASE_FILE, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        The selected rows, in the order they were written
+    """
+    select = "*" if columns is None else ", ".join(f'"{col}"' for col in columns)
+    where, params = make_where_clause(filters)
+
+    connection = connect(database_file)
+    try:
+        df = pd.read_sql_query(
+            f'SELECT {select} FROM "{table}" {where} ORDER BY rowid',
+            connection,
+            params=params,
+        )
+    finally:
+        connection.close()
+
+    return df
+
+
+def aggregate(table, value_cols, by, how="AVG", filters=None, database_file=DATABASE_FILE):
+    """
+    Aggregate columns of a table of the SQLite database by group.
+
+    Parameters
+    ----------
+    table : str
+        Name of the table (see `build_store()`)
+
+    value_cols : list of str
+        Columns to aggregate
+
+    by : list of str
+        Columns defining the groups
+
+    how : str, optional
+        SQL aggregate function ("AVG", "SUM", "MIN", "MAX", or "COUNT")
+        (default is "AVG")
+
+    filters : dict, optional
+        A dictionary of the values to select before aggregating (see
+        `query()`); by default, all rows are aggregated
+
+    database_file : str, optional
+        Path to the SQLite database file
+        (default is DATABASE_FILE, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with one row for each group, sorted by `by`, with the
+        `by` columns and the aggregated `value_cols`
+    """
+    assert how.upper() in ["AVG", "SUM", "MIN", "MAX", "COUNT"], "Invalid aggregate function."
+
+    group_cols = ", ".join(f'"{col}"' for col in by)
+    aggregates = ", ".join(f'{how}("{col}") AS "{col}"' for col in value_cols)
+    where, params = make_where_clause(filters)
+
+    connection = connect(database_file)
+    try:
+        df = pd.read_sql_query(
+            f'SELECT {group_cols}, {aggregates} FROM "{table}" {where} '
+            f"GROUP BY {group_cols} ORDER BY {group_cols}",
+            connection,
+            params=params,
+        )
+    finally:
+        connection.close()
+
+    return df
+
+
+if __name__ == "__main__":
+    tables = build_store()
+    print(f"{len(tables)} tables written to: {DATABASE_FILE}")
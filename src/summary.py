@@ -1,10 +1,77 @@
-def calc_summary_stats(errors, component):
+import numpy as np
+import pandas as pd
+from errors import error_measures
+from merge import add_optional_keys
+
+
+# Baseline seasons evaluated for each component, selected by the
+# `{season}_flag` columns. The first season listed for each component is the
+# one used in CBO's published summary statistics.
+seasons = {
+    "outlay": ["Spring"],
+    "revenue": ["Winter", "Spring"],
+    "deficit": ["Spring"],
+    "debt": ["Spring"],
+}
+
+group_cols = [
+    "component",
+    "category",
+    "subcategory",
+    "season",
+    "projected_year_number",
+]
+
+
+def stack_seasons(errors, component, seasons=seasons):
+    """
+    Stack the projection errors of each baseline season evaluated for a
+    given budgetary component.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        The errors of each season, selected by the `{season}_flag` column,
+        stacked with a `season` column identifying the season
+
+    Notes
+    -----
+    A baseline can be both the Winter and the Spring baseline of a year, so
+    its errors appear once for each season.
+    """
+    stacked_errors = pd.concat(
+        [
+            errors.loc[errors[f"{season}_flag"] == True, :].assign(season=season)
+            for season in seasons[component]
+        ],
+        ignore_index=True,
+    )
+
+    return stacked_errors
+
+
+def calc_summary_stats(errors, component, seasons=seasons, group_cols=group_cols):
     """
     Calculate summary statistics of projection errors for a given budgetary
     component.
 
-    For each projection year (1st through 11th) and component (outlay,
-    revenue, deficit, and debt) the summary statistics calculated are:
+    For each baseline season, projection year (1st through 11th), and
+    component (outlay, revenue, deficit, and debt) the summary statistics
+    calculated are:
         - average error
         - average absolute error
         - root mean squared error (RMSE)
@@ -19,6 +86,15 @@ def calc_summary_stats(errors, component):
         The component for which projection errors are analyzed
         ("outlay", "revenue", "deficit", "debt")
 
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined above)
+
+    group_cols : list of str, optional
+        A list of columns to group by when calculating summary statistics
+        (default is group_cols, defined above)
+
     Returns
     -------
     summary_stats : pandas.DataFrame
@@ -27,6 +103,7 @@ def calc_summary_stats(errors, component):
             - component
             - category
             - subcategory
+            - season
             - projected_year_number
 
         The summary statistics include:
@@ -34,19 +111,21 @@ def calc_summary_stats(errors, component):
             - average_absolute_error: average absolute projection error
             - RMSE: Root Mean Squared Error
             - two_thirds_spread: Central two-thirds of the error distribution
-    """
-    errors = errors.copy()
 
-    group_cols = ["component", "category", "subcategory", "projected_year_number"]
+    Notes
+    -----
+    The errors for each season are stacked (with a `season` column) before
+    a single groupby() calculates the statistics for every season at once.
 
-    if component in ["deficit", "debt"]:
-        error_col = "projection_error_pct_GDP"
-    else:
-        error_col = "projection_error_pct_actual"
+    If the errors have a `source` column (see `merge.merge_data()`), the
+    statistics of every source are calculated in the same groupby(), with
+    `source` added to the groups after `component`.
+    """
+    group_cols = add_optional_keys(group_cols, errors)
+
+    error_col = error_measures[component]
 
-    # Filter errors for revenue component when Winter_flag is True
-    if component == "revenue":
-        errors = errors[errors["Winter_flag"] == True]
+    errors = stack_seasons(errors, component, seasons)
 
     # Calculate projection_year_range before groupby
     errors["projection_year_range"] = (
@@ -86,3 +165,260 @@ def calc_summary_stats(errors, component):
     summary_stats.columns = group_cols + stats_cols
 
     return summary_stats
+
+
+def select_published_stats(seasonal_stats, component, seasons=seasons):
+    """
+    Select the summary statistics published for a given budgetary
+    component.
+
+    Parameters
+    ----------
+    seasonal_stats : pandas.DataFrame
+        Summary statistics for each season, created by
+        `calc_summary_stats()`
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons evaluated for each
+        component; the published statistics are for the first season
+        (default is seasons, defined above)
+
+    Returns
+    -------
+    pandas.DataFrame
+        The summary statistics of the first season, without the `season`
+        column
+    """
+    published_stats = seasonal_stats.loc[
+        seasonal_stats["season"] == seasons[component][0], :
+    ].drop(columns=["season"])
+
+    return published_stats
+
+
+def make_decay_weights(baseline_dates, half_lives, reference_date=None):
+    """
+    Make exponentially time-decayed weights of baseline vintages.
+
+    Parameters
+    ----------
+    baseline_dates : list-like of str
+        Baseline dates (YYYY-MM-DD) of the vintages
+
+    half_lives : list of float
+        Half-lives of the weights, in years; each half-life is a weighting
+        scheme
+
+    reference_date : str, optional
+        Date at which the weights are 1; by default, the latest baseline
+        date
+
+    Returns
+    -------
+    pandas.DataFrame
+        Weight matrix with one row for each baseline date (the index) and
+        one column for each half-life (`half_life_[years]`), for use with
+        `calc_weighted_summary_stats()`. A baseline's weight halves for
+        every half-life between it and `reference_date`.
+    """
+    baseline_dates = pd.Index(pd.unique(pd.Series(baseline_dates)), name="baseline_date")
+    dates = pd.to_datetime(baseline_dates, format="%Y-%m-%d")
+    if reference_date is None:
+        reference = dates.max()
+    else:
+        reference = pd.to_datetime(reference_date, format="%Y-%m-%d")
+
+    ages = ((reference - dates).days / 365.25).to_numpy()
+
+    weights = pd.DataFrame(
+        {
+            f"half_life_{half_life:g}": 0.5 ** (ages / half_life)
+            for half_life in half_lives
+        },
+        index=baseline_dates,
+    )
+
+    return weights
+
+
+def calc_weighted_summary_stats(
+    errors,
+    component,
+    weights,
+    seasons=seasons,
+    group_cols=group_cols,
+):
+    """
+    Calculate weighted summary statistics of projection errors for a given
+    budgetary component, for many weighting schemes at once.
+
+    Parameters
+    ----------
+    errors : pandas.DataFrame
+        DataFrame containing disaggregated projection errors
+
+    component : str
+        The component for which projection errors are analyzed
+        ("outlay", "revenue", "deficit", "debt")
+
+    weights : pandas.DataFrame
+        Weight matrix with one row for each baseline date (the index) and
+        one column of positive weights for each weighting scheme, such as
+        the result of `make_decay_weights()`. Every baseline of `errors`
+        must have weights.
+
+    seasons : dict, optional
+        A dictionary containing the baseline seasons ("Winter", "Spring")
+        to evaluate for each component
+        (default is seasons, defined above)
+
+    group_cols : list of str, optional
+        A list of columns to group by when calculating summary statistics
+        (default is group_cols, defined above)
+
+    Returns
+    -------
+    weighted_stats : pandas.DataFrame
+        DataFrame with one row for each group and weighting scheme, with
+        the columns:
+            - group_cols
+            - weighting: name of the weighting scheme (column of `weights`)
+            - number_of_projections
+            - effective_number_of_projections: squared sum of the weights
+              divided by the sum of the squared weights
+            - average_error, average_absolute_error, RMSE,
+              two_thirds_spread: the weighted statistics
+
+    Notes
+    -----
+    The errors are sorted once by group and by value, and the weighted
+    sums of every group and weighting scheme are calculated together from
+    the matrix of weights, so evaluating many schemes costs about the same
+    as evaluating one.
+
+    This is a separate pass over the errors rather than part of the
+    groupby() of `calc_summary_stats()`: that groupby() produces the
+    published statistics (one row for each group, with the projection year
+    range) and is left unchanged, while the weighted statistics have one
+    row for each group and weighting scheme, and their quantiles need the
+    errors of each group sorted together with their weights. The extra
+    pass costs one sort of the errors, whatever the number of schemes.
+
+    The two-thirds spread uses weighted quantiles, interpolated linearly
+    between errors placed at the midpoints of their cumulative weights
+    (rescaled so the smallest and largest errors are at 0 and 1). With
+    equal weights, all statistics are the same as those of
+    `calc_summary_stats()`.
+    """
+    group_cols = add_optional_keys(group_cols, errors)
+    error_col = error_measures[component]
+
+    stacked_errors = stack_seasons(errors, component, seasons)
+    stacked_errors = stacked_errors.loc[
+        stacked_errors[error_col].notna(),
+        group_cols + ["baseline_date", error_col],
+    ]
+
+    missing_dates = set(stacked_errors["baseline_date"]) - set(weights.index)
+    assert len(missing_dates) == 0, f"Missing weights for baselines {sorted(missing_dates)}."
+    assert (weights.to_numpy() > 0).all(), "Weights must be positive."
+
+    # A single sort puts each group's errors together, in increasing order
+    sorted_errors = stacked_errors.sort_values(group_cols + [error_col]).reset_index(drop=True)
+    codes = sorted_errors.groupby(group_cols, observed=True, sort=False).ngroup().to_numpy()
+    starts = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+    counts = np.diff(np.append(starts, len(sorted_errors)))
+
+    values = sorted_errors[error_col].to_numpy(dtype="float")[:, np.newaxis]
+    w = weights.loc[sorted_errors["baseline_date"], :].to_numpy(dtype="float")
+
+    # Weighted sums of every group (rows) and weighting scheme (columns)
+    sum_w = np.add.reduceat(w, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stats = {
+            "number_of_projections": np.repeat(counts[:, np.newaxis], w.shape[1], axis=1),
+            "effective_number_of_projections": sum_w**2 / np.add.reduceat(w**2, starts),
+            "average_error": np.add.reduceat(w * values, starts) / sum_w,
+            "average_absolute_error": np.add.reduceat(w * np.abs(values), starts) / sum_w,
+            "RMSE": np.sqrt(np.add.reduceat(w * values**2, starts) / sum_w),
+            "two_thirds_spread": (
+                calc_weighted_quantiles(values[:, 0], w, starts, counts, 5 / 6)
+                - calc_weighted_quantiles(values[:, 0], w, starts, counts, 1 / 6)
+            ),
+        }
+
+    keys = sorted_errors.loc[starts, group_cols].reset_index(drop=True)
+    weighted_stats = keys.loc[keys.index.repeat(w.shape[1]), :].reset_index(drop=True)
+    weighted_stats["weighting"] = np.tile(weights.columns, len(keys))
+    for stat, stat_values in stats.items():
+        weighted_stats[stat] = stat_values.ravel()
+
+    return weighted_stats
+
+
+def calc_weighted_quantiles(values, weights, starts, counts, quantile):
+    """
+    Calculate a weighted quantile of sorted groups of values, for many
+    weighting schemes at once.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values sorted by group and by value
+
+    weights : numpy.ndarray
+        Matrix of positive weights, with one row for each value and
+        one column for each weighting scheme
+
+    starts : numpy.ndarray
+        Position in `values` of the first value of each group
+
+    counts : numpy.ndarray
+        Number of values in each group
+
+    quantile : float
+        The quantile to calculate, between 0 and 1
+
+    Returns
+    -------
+    numpy.ndarray
+        The quantile of each group (rows) and weighting scheme (columns)
+    """
+    num_values, num_schemes = weights.shape
+    group_idx = np.repeat(np.arange(len(starts)), counts)
+    ends = starts + counts - 1
+
+    # Plotting position of each value: the midpoint of its cumulative
+    # weight, rescaled to run from 0 (first value) to 1 (last value)
+    cum_weights = np.cumsum(weights, axis=0)
+    group_offsets = (cum_weights[starts] - weights[starts])[group_idx]
+    midpoints = cum_weights - group_offsets - weights / 2
+    first = (weights[starts] / 2)[group_idx]
+    last = (cum_weights[ends] - cum_weights[starts] + weights[starts] - weights[ends] / 2)[group_idx]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        positions = np.nan_to_num((midpoints - first) / (last - first))
+
+    # Search every scheme and group at once, offsetting the positions of
+    # each so they increase through the flattened (scheme-major) array
+    group_ids = np.arange(len(starts))[:, np.newaxis]
+    scheme_ids = np.arange(num_schemes)[np.newaxis, :]
+    keys = (positions + (scheme_ids * len(starts) + group_idx[:, np.newaxis]) * 2).ravel(order="F")
+    targets = (scheme_ids * len(starts) + group_ids) * 2 + quantile
+    found = np.searchsorted(keys, targets.ravel(order="F"), side="right") - 1
+    lower = (found % num_values).reshape(targets.shape, order="F")
+
+    # Interpolate between the values around the quantile
+    lower = np.clip(lower, starts[:, np.newaxis], np.maximum(ends - 1, starts)[:, np.newaxis])
+    upper = np.minimum(lower + 1, ends[:, np.newaxis])
+    scheme_cols = np.broadcast_to(scheme_ids, lower.shape)
+    lower_positions = positions[lower, scheme_cols]
+    upper_positions = positions[upper, scheme_cols]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fractions = np.nan_to_num((quantile - lower_positions) / (upper_positions - lower_positions))
+    fractions = np.clip(fractions, 0, 1)
+
+    return values[lower] + (values[upper] - values[lower]) * fractions
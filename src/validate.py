@@ -0,0 +1,271 @@
+import pandas as pd
+from merge import cats, subcats, source_col, vintage_col, add_optional_keys
+
+components = ["outlay", "revenue", "deficit", "debt"]
+
+key_cols = {
+    "actuals": ["component", "category", "subcategory", "fiscal_year"],
+    "baselines": [
+        "component",
+        "category",
+        "subcategory",
+        "baseline_date",
+        "projected_fiscal_year",
+    ],
+    "changes": [
+        "component",
+        "category",
+        "subcategory",
+        "changes_baseline_date",
+        "change_category",
+        "projected_fiscal_year",
+    ],
+    "GDP": ["fiscal_year"],
+}
+
+date_cols = {
+    "baselines": "baseline_date",
+    "changes": "changes_baseline_date",
+}
+
+# Maximum number of offending values listed for each problem
+max_examples = 5
+
+
+def validate_inputs(dfs, key_cols=key_cols, date_cols=date_cols):
+    """
+    Check the input data for problems before they are merged.
+
+    Parameters
+    ----------
+    dfs : tuple of pandas.DataFrame
+        A tuple containing the actuals, baselines, changes, and GDP
+        DataFrames (see `merge.merge_data()`)
+
+    key_cols : dict, optional
+        A dictionary containing the columns that uniquely identify the
+        rows of each input DataFrame
+        (default is key_cols, defined above)
+
+    date_cols : dict, optional
+        A dictionary containing the baseline date column of each input
+        DataFrame that has one
+        (default is date_cols, defined above)
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    AssertionError
+        If any problem is found, with a report listing every problem
+
+    Notes
+    -----
+    The checks are:
+    1. No duplicate keys in any input. (A duplicate key in the actuals,
+       for example, would multiply rows when merging.)
+    2. GDP is available for every fiscal year (and vintage) of the
+       actuals. (Otherwise, values as a percent of GDP would be missing.)
+    3. The components, categories, and subcategories of the baselines and
+       changes are in the orderings used by `merge.sort_data()`.
+       (Otherwise, they would become missing values when sorted.)
+    4. The baseline dates can be parsed as ISO-8601 (YYYY-MM-DD) dates.
+    5. If the changes have a `source` column, so do the baselines.
+       (Changes without one apply to the baselines of every source.)
+
+    The `source` column of the baselines and changes, and the `vintage`
+    column of the actuals and GDP, if any, are part of their keys.
+
+    All checks use grouped counts and set differences on whole columns,
+    so they take milliseconds on the full inputs.
+    """
+    inputs = dict(zip(["actuals", "baselines", "changes", "GDP"], dfs))
+
+    problems = []
+    for name, df in inputs.items():
+        problems += check_duplicate_keys(df, name, add_optional_keys(key_cols[name], df))
+
+    problems += check_GDP_coverage(inputs["actuals"], inputs["GDP"])
+
+    for name in ["baselines", "changes"]:
+        problems += check_categories(inputs[name], name)
+
+    for name, col in date_cols.items():
+        problems += check_dates(inputs[name], name, col)
+
+    if source_col in inputs["changes"].columns and source_col not in inputs["baselines"].columns:
+        problems.append(f"changes: {source_col!r} column, but the baselines have none")
+
+    report = "\n".join(["Input data failed validation:"] + [f"  - {p}" for p in problems])
+    assert len(problems) == 0, report
+
+    return None
+
+
+def check_duplicate_keys(df, name, keys):
+    """
+    Check an input DataFrame for duplicate keys.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Input DataFrame to check
+
+    name : str
+        Name of the input, used in the report
+
+    keys : list of str
+        Columns that uniquely identify the rows of `df`
+
+    Returns
+    -------
+    list of str
+        Description of each problem found
+    """
+    counts = df.groupby(keys, dropna=False).size()
+    duplicates = counts[counts > 1]
+
+    problems = []
+    if len(duplicates) > 0:
+        examples = [
+            f"{dict(zip(keys, key if isinstance(key, tuple) else (key,)))} ({count} rows)"
+            for key, count in duplicates.head(max_examples).items()
+        ]
+        problems.append(
+            f"{name}: {len(duplicates)} duplicate keys, e.g. " + "; ".join(examples)
+        )
+
+    return problems
+
+
+def check_GDP_coverage(actuals, GDP):
+    """
+    Check that GDP is available for every fiscal year of the actuals.
+
+    Parameters
+    ----------
+    actuals : pandas.DataFrame
+        DataFrame containing actual values
+
+    GDP : pandas.DataFrame
+        DataFrame containing GDP
+
+    Returns
+    -------
+    list of str
+        Description of each problem found (with the vintages of the
+        missing years, if GDP has vintages)
+    """
+    if vintage_col not in GDP.columns:
+        GDP_years = set(GDP.loc[GDP["GDP"].notna(), "fiscal_year"])
+        missing_years = sorted(set(actuals["fiscal_year"]) - GDP_years)
+    else:
+        # Each vintage of GDP must cover the actuals of the same vintage, or
+        # all the actuals if they have no vintages
+        if vintage_col not in actuals.columns:
+            actuals = pd.merge(
+                actuals[["fiscal_year"]].drop_duplicates(),
+                GDP[[vintage_col]].drop_duplicates(),
+                how="cross",
+            )
+        key_cols = [vintage_col, "fiscal_year"]
+        GDP_keys = set(GDP.loc[GDP["GDP"].notna(), key_cols].itertuples(index=False, name=None))
+        actuals_keys = set(actuals[key_cols].itertuples(index=False, name=None))
+        missing_years = sorted(actuals_keys - GDP_keys)
+
+    problems = []
+    if len(missing_years) > 0:
+        problems.append(
+            f"GDP: missing for {len(missing_years)} fiscal years of the actuals, "
+            f"e.g. {missing_years[:max_examples]}"
+        )
+
+    return problems
+
+
+def check_categories(df, name, cats=cats, subcats=subcats):
+    """
+    Check that the components, categories, and subcategories of an input
+    DataFrame are in the orderings used to sort the merged data.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Input DataFrame to check
+
+    name : str
+        Name of the input, used in the report
+
+    cats : dict, optional
+        A dictionary containing the ordering of the categories of each
+        component (default is cats, defined in merge.py)
+
+    subcats : dict, optional
+        A dictionary containing the ordering of the subcategories of each
+        component (default is subcats, defined in merge.py)
+
+    Returns
+    -------
+    list of str
+        Description of each problem found
+    """
+    problems = []
+
+    unknown_components = sorted(set(df["component"]) - set(components), key=str)
+    if len(unknown_components) > 0:
+        problems.append(f"{name}: unknown components {unknown_components}")
+
+    for col, orderings in [("category", cats), ("subcategory", subcats)]:
+        known_values = {
+            (component, value)
+            for component, values in orderings.items()
+            for value in values
+        }
+        values = set(map(tuple, df[["component", col]].drop_duplicates().to_numpy()))
+        unknown_values = sorted(
+            (
+                (component, value)
+                for component, value in values - known_values
+                if component in components
+            ),
+            key=str,
+        )
+        for component, value in unknown_values:
+            problems.append(f"{name}: unknown {component} {col} {value!r}")
+
+    return problems
+
+
+def check_dates(df, name, col):
+    """
+    Check that a date column can be parsed as ISO-8601 (YYYY-MM-DD) dates.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Input DataFrame to check
+
+    name : str
+        Name of the input, used in the report
+
+    col : str
+        Name of the date column
+
+    Returns
+    -------
+    list of str
+        Description of each problem found
+    """
+    dates = pd.to_datetime(df[col], format="%Y-%m-%d", errors="coerce")
+    bad_dates = df.loc[dates.isna(), col].unique()
+
+    problems = []
+    if len(bad_dates) > 0:
+        problems.append(
+            f"{name}: {len(bad_dates)} unparseable values of {col}, "
+            f"e.g. {list(bad_dates[:max_examples])}"
+        )
+
+    return problems
@@ -0,0 +1,326 @@
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import os.path
+import sys
+import time
+import traceback
+import pandas as pd
+from data_io import input_files, submit_outputs
+from validate import validate_inputs
+from merge import merge_data, select_component_inputs
+from errors import calc_errors
+from summary import calc_summary_stats
+from scale import scale_actuals
+from write_Excel import write_Excel
+from ExcelWriter.read_parameters import read_parameters
+from ExcelWriter.worksheets import worksheets
+from ExcelWriter.make_data_underlying_figures import make_all_data
+
+CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
+INPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../input_data")
+OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
+PARAMETERS_FILE = os.path.abspath(f"{CURRENT_PATH}/../Excel_parameters.yml")
+
+# Seconds between checks of the watched files
+poll_interval = 0.25
+
+
+def make_stages(components, input_path=INPUT_PATH, parameters_file=PARAMETERS_FILE):
+    """
+    Define the stages of the pipeline as a directed acyclic graph.
+
+    Parameters
+    ----------
+    components : list of str
+        The components analyzed ("outlay", "revenue", "deficit", "debt")
+
+    input_path : str, optional
+        Path to the directory containing the input data files
+        (default is INPUT_PATH, defined above)
+
+    parameters_file : str, optional
+        Path to the Excel parameters file
+        (default is PARAMETERS_FILE, defined above)
+
+    Returns
+    -------
+    stages : dict
+        A dictionary keyed by stage name, in topological order, of
+        (function, dependencies, watched file) tuples. Each function is
+        called with the results of its dependencies, in order. Source
+        stages (which read a watched file) have no dependencies; the
+        watched file is None for the other stages.
+
+    Notes
+    -----
+    The stages are:
+
+    - `input:[name]` and `parameters`: read an input data file or the
+      Excel parameters file
+    - `validate`: check the input data (see `validate.validate_inputs()`)
+    - `scaled_actuals`: actual values as a percent of GDP
+    - `inputs:[component]`, `merge:[component]`, `errors:[component]`,
+      `summary:[component]`, and `write:[component]`: the per-component
+      analysis of `main.py`
+    - `figure_data` and `workbook`: the data underlying the figures and
+      the Excel file
+    """
+    stages = {}
+    for name, filename in input_files.items():
+        stages[f"input:{name}"] = (
+            lambda file=os.path.join(input_path, filename): pd.read_csv(file),
+            [],
+            os.path.join(input_path, filename),
+        )
+    stages["parameters"] = (lambda: read_parameters(parameters_file), [], parameters_file)
+
+    input_stages = [f"input:{name}" for name in input_files]
+    stages["validate"] = (lambda *dfs: validate_inputs(dfs), input_stages, None)
+    stages["scaled_actuals"] = (scale_actuals, ["input:actuals", "input:GDP"], None)
+
+    for component in components:
+        stages[f"inputs:{component}"] = (
+            lambda *dfs, component=component: select_component_inputs(dfs, component),
+            input_stages,
+            None,
+        )
+        stages[f"merge:{component}"] = (
+            lambda dfs, component=component: merge_data(dfs, component),
+            [f"inputs:{component}"],
+            None,
+        )
+        stages[f"errors:{component}"] = (
+            lambda data, component=component: calc_errors(data, component),
+            [f"merge:{component}"],
+            None,
+        )
+        stages[f"summary:{component}"] = (
+            lambda errors, component=component: calc_summary_stats(errors, component),
+            [f"errors:{component}"],
+            None,
+        )
+        stages[f"write:{component}"] = (
+            lambda *results, component=component: write_component(component, *results),
+            [f"errors:{component}", f"summary:{component}", "scaled_actuals"],
+            None,
+        )
+
+    # The figure data are made from the output files (and some input files)
+    stages["figure_data"] = (
+        lambda *results: make_all_data(copy.deepcopy(worksheets)),
+        [f"write:{component}" for component in components] + input_stages,
+        None,
+    )
+    stages["workbook"] = (
+        lambda figure_worksheets, params: write_Excel(params, figure_worksheets, make_data=False),
+        ["figure_data", "parameters"],
+        None,
+    )
+
+    return stages
+
+
+def write_component(component, projection_errors, seasonal_stats, scaled_actuals):
+    """
+    Write the output files of a component and wait until they are written.
+
+    Parameters
+    ----------
+    component : str
+        The component whose output files are written
+        ("outlay", "revenue", "deficit", "debt")
+
+    projection_errors, seasonal_stats, scaled_actuals : pandas.DataFrame
+        The results written (see `data_io.submit_outputs()`)
+
+    Returns
+    -------
+    None; Writes CSV files to disk.
+    """
+    with ThreadPoolExecutor(max_workers=4) as writer_pool:
+        writes = submit_outputs(
+            writer_pool,
+            OUTPUT_PATH,
+            component,
+            projection_errors,
+            seasonal_stats,
+            scaled_actuals,
+        )
+        for write in writes.values():
+            write.result()
+
+    return None
+
+
+def fingerprint(result):
+    """
+    Calculate a fingerprint of the result of a stage.
+
+    Parameters
+    ----------
+    result : object
+        Result of a stage
+
+    Returns
+    -------
+    tuple or None
+        A fingerprint of the contents of DataFrames (and tuples of them),
+        or None for other results, which are always treated as changed
+    """
+    if isinstance(result, pd.DataFrame):
+        hashes = pd.util.hash_pandas_object(result, index=True)
+        return (tuple(result.columns), len(result), int(hashes.sum()))
+    if isinstance(result, tuple) and all(isinstance(df, pd.DataFrame) for df in result):
+        return tuple(fingerprint(df) for df in result)
+
+    return None
+
+
+def run_stages(stages, results, fingerprints, dirty):
+    """
+    Rerun the stages of the pipeline affected by changes.
+
+    Parameters
+    ----------
+    stages : dict
+        Stages of the pipeline, created by `make_stages()`
+
+    results : dict
+        Results of the stages that have been run, keyed by stage name;
+        updated in place
+
+    fingerprints : dict
+        Fingerprints of the results, keyed by stage name; updated in place
+
+    dirty : set of str
+        Names of the stages to rerun; updated in place. Stages that fail
+        are left in `dirty`, so they are rerun after the next change.
+
+    Returns
+    -------
+    list of str
+        Names of the stages that were run
+
+    Notes
+    -----
+    Stages are run in topological order. When the result of a stage has
+    the same fingerprint as before (for example, when an edited input
+    file only changes the rows of other components), the stages that
+    depend on it are not rerun. Results of stages that are not rerun are
+    kept in memory.
+    """
+    dependents = {name: [] for name in stages}
+    for name, (function, dependencies, watched_file) in stages.items():
+        for dependency in dependencies:
+            dependents[dependency].append(name)
+
+    ran = []
+    for name, (function, dependencies, watched_file) in stages.items():
+        if name not in dirty:
+            continue
+
+        try:
+            results[name] = function(*[results[dependency] for dependency in dependencies])
+        except Exception:
+            print(f"Stage {name} failed:")
+            traceback.print_exc()
+            # Later stages would use stale or missing results
+            return ran
+
+        dirty.discard(name)
+        ran.append(name)
+
+        new_fingerprint = fingerprint(results[name])
+        if new_fingerprint is None or new_fingerprint != fingerprints.get(name):
+            dirty.update(dependents[name])
+        fingerprints[name] = new_fingerprint
+
+    return ran
+
+
+def get_mtimes(stages):
+    """
+    Get the modification times of the files watched by the stages.
+
+    Parameters
+    ----------
+    stages : dict
+        Stages of the pipeline, created by `make_stages()`
+
+    Returns
+    -------
+    dict
+        Modification time (in nanoseconds) of each watched file, keyed by
+        the name of the stage watching it; None for missing files
+    """
+    mtimes = {}
+    for name, (function, dependencies, watched_file) in stages.items():
+        if watched_file is not None:
+            try:
+                mtimes[name] = os.stat(watched_file).st_mtime_ns
+            except FileNotFoundError:
+                mtimes[name] = None
+
+    return mtimes
+
+
+def watch(components, poll_interval=poll_interval):
+    """
+    Run the pipeline, then rerun the stages affected by each change to
+    the input data files or the Excel parameters file.
+
+    Parameters
+    ----------
+    components : list of str
+        The components analyzed ("outlay", "revenue", "deficit", "debt")
+
+    poll_interval : float, optional
+        Seconds between checks of the watched files
+        (default is poll_interval, defined above)
+
+    Returns
+    -------
+    None; Runs until interrupted (Ctrl-C).
+
+    Notes
+    -----
+    Files are watched by polling their modification times, so no
+    additional packages are needed.
+    """
+    stages = make_stages(components)
+    results, fingerprints = {}, {}
+    dirty = set(stages)
+    mtimes = get_mtimes(stages)
+
+    while True:
+        if len(dirty) > 0:
+            start = time.perf_counter()
+            ran = run_stages(stages, results, fingerprints, dirty)
+            elapsed = time.perf_counter() - start
+            print(f"Ran {len(ran)} stages in {elapsed:.2f} seconds: {', '.join(ran)}")
+            print("Watching for changes (press Ctrl-C to stop)")
+
+        time.sleep(poll_interval)
+
+        new_mtimes = get_mtimes(stages)
+        changed = [name for name in new_mtimes if new_mtimes[name] != mtimes[name]]
+        mtimes = new_mtimes
+        for name in changed:
+            if mtimes[name] is not None:
+                dirty.add(name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv[1:]) == 0:
+        components = ["outlay", "revenue", "deficit", "debt"]
+    else:
+        components = sys.argv[1:]
+
+    for component in components:
+        assert_message = "You passed an invalid argument to src/watch.py.\nPlease try again."
+        assert component in ["outlay", "revenue", "deficit", "debt"], assert_message
+
+    try:
+        watch(components)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
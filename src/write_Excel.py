@@ -16,9 +16,8 @@ CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
 OUTPUT_PATH = os.path.abspath(f"{CURRENT_PATH}/../output_data")
 
 params = read_parameters(f"{CURRENT_PATH}/../Excel_parameters.yml")
-worksheets = make_all_data(worksheets)  # Create all the data and add them to the worksheets dictionary
 
-def write_Excel(params=params, worksheets=worksheets):
+def write_Excel(params=params, worksheets=worksheets, make_data=True, output_path=OUTPUT_PATH):
     """Write the Excel file based on the parameters and worksheets provided.
 
     Parameters
@@ -27,17 +26,34 @@ def write_Excel(params=params, worksheets=worksheets):
         High-level parameters for the Excel file.
     worksheets : dict, by default worksheets
         Contains worksheet-specific parameters for the Excel file.
+    make_data : bool, by default True
+        Whether to create the data underlying the figures. If False, the
+        worksheets must already contain their data (see `make_all_data()`).
+    output_path : str, by default OUTPUT_PATH
+        Directory of the output CSV files the data are created from; the
+        Excel file is written to its `Excel` subdirectory.
 
     Returns
     -------
     None; Writes Excel file to disk.
+
+    Notes
+    -----
+    The data underlying the figures are created from the output CSV files
+    when this function is called (not when this module is imported), so
+    the Excel file reflects the output files written by `main.py`.
     """
     # Only write out/update Excel file *before* publication
     if datetime.today() < datetime(*params.DETAILED_PUB_DATE):
 
+        # Create all the data and add them to the worksheets dictionary
+        if make_data:
+            worksheets = make_all_data(worksheets, output_path=output_path)
+
         # Excel file details
         filename = f'{params.PUB_NUM}-data.xlsx'
-        filepath = os.path.join(os.path.abspath(f"{OUTPUT_PATH}/Excel"), filename)
+        filepath = os.path.join(os.path.abspath(f"{output_path}/Excel"), filename)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
         writer = pd.ExcelWriter(filepath, engine='xlsxwriter')
         workbook  = writer.book
 
@@ -61,7 +77,7 @@ def write_Excel(params=params, worksheets=worksheets):
             wb.set_properties({'created' : datetime(1974, 7, 12, 12, 27)})
 
         print(f"Data Underlying Figures Excel file for CBO publication {params.PUB_NUM} created successfully.")
-        print(f"Excel file written to: {OUTPUT_PATH}\\Excel.\n")
+        print(f"Excel file written to: {output_path}\\Excel.\n")
 
     return None
 